@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# Batch "which ZIP / which technician owns this job?" for CSV or Parquet files of job lat/lon points.
+# Input is streamed in chunks; each chunk is a vectorized point-in-polygon join against the ZIP
+# STRtree, and chunks run across a process pool with a bounded number in flight, so memory stays
+# at roughly (workers x 2) chunks no matter how large the input is. Output keeps input order.
+#
+# Usage: python assign_jobs.py jobs.csv --roster roster.json [--zips zips_snapshot.geojson]
+#                              [--out jobs_assigned.csv] [--lat lat --lon lon] [--workers 8]
+#                              [--nearest 3]   (k nearest technicians for jobs nobody covers)
+
+import argparse
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+
+from map import load_zips
+from nearest_tech import NearestTechIndex
+
+# ---------------------- SETTINGS ----------------------
+CHUNK_ROWS = 200_000
+WORKERS    = os.cpu_count() or 2
+LAT_COLS   = ["lat", "latitude", "y"]
+LON_COLS   = ["lon", "lng", "long", "longitude", "x"]
+# ------------------------------------------------------
+
+# ---- per-process state (filled once by the pool initializer) ----
+_ZIPS = None      # GeoDataFrame: zip, geometry
+_TREE = None      # shapely STRtree over ZIP polygons
+_OWNERS = None    # ZIP -> (tech ids "1|4", tech names "A|B")
+_NEAREST = None   # (NearestTechIndex, k) when --nearest is on
+
+def roster_owners(roster) -> dict:
+    by_zip = {}
+    for t in roster:
+        for z in t.get("zips", []):
+            by_zip.setdefault(str(z), []).append(t)
+    return {z: ("|".join(str(t["id"]) for t in ts), "|".join(t["name"] for t in ts)) for z, ts in by_zip.items()}
+
+def _init_worker(zips_gdf, owners, nearest):
+    global _ZIPS, _TREE, _OWNERS, _NEAREST
+    _ZIPS = zips_gdf
+    _TREE = shapely.STRtree(zips_gdf.geometry.to_numpy())
+    _OWNERS = owners
+    _NEAREST = nearest
+
+def assign_points(lon: np.ndarray, lat: np.ndarray, tree, zip_codes: np.ndarray):
+    # One bulk STRtree query; a point on a shared border takes the lowest-index ZIP
+    pts = shapely.points(lon, lat)
+    pt_idx, zip_idx = tree.query(pts, predicate="intersects")
+    out = np.full(len(pts), None, dtype=object)
+    first = np.unique(pt_idx, return_index=True)[1]
+    out[pt_idx[first]] = zip_codes[zip_idx[first]]
+    return out
+
+def _assign_chunk(args):
+    df, lat_col, lon_col = args
+    lat = pd.to_numeric(df[lat_col], errors="coerce").to_numpy(dtype=float)
+    lon = pd.to_numeric(df[lon_col], errors="coerce").to_numpy(dtype=float)
+    zips = assign_points(lon, lat, _TREE, _ZIPS["zip"].to_numpy())
+    owners = pd.Series(zips).map(_OWNERS)
+    df = df.copy()
+    df["zip"] = zips
+    df["tech_ids"] = [o[0] if isinstance(o, tuple) else "" for o in owners]
+    df["tech_names"] = [o[1] if isinstance(o, tuple) else "" for o in owners]
+    if _NEAREST is not None:
+        # fallback only for valid points nobody owns; same vectorized pass over the chunk
+        index, k = _NEAREST
+        need = (df["tech_ids"].eq("") & np.isfinite(lat) & np.isfinite(lon)).to_numpy()
+        cols = {c: np.full(len(df), "", dtype=object) for c in ("nearest_tech_ids", "nearest_tech_names", "nearest_miles")}
+        if need.any():
+            for c, v in index.label_columns(*index.query_many(lon[need], lat[need], k)).items():
+                cols[c][need] = v
+        for c, v in cols.items():
+            df[c] = v
+    return df
+
+def read_chunks(path: Path, size: int):
+    if path.suffix.lower() in (".parquet", ".pq"):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=size, dtype=str, keep_default_na=False)
+
+# columns added by the assignment; always strings, even in a chunk where every value is empty/None
+OUT_COLUMNS = ("zip", "tech_ids", "tech_names", "nearest_tech_ids", "nearest_tech_names", "nearest_miles")
+
+class ChunkWriter:
+    def __init__(self, path: Path):
+        self.path = path
+        self.parquet = path.suffix.lower() in (".parquet", ".pq")
+        self.writer = None
+        self.schema = None
+        self.rows = 0
+
+    def write(self, df: pd.DataFrame):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            if self.schema is None:
+                # input columns keep the first chunk's types; the added ones are fixed as string
+                base = pa.Schema.from_pandas(df, preserve_index=False)
+                self.schema = pa.schema([pa.field(f.name, pa.string()) if f.name in OUT_COLUMNS else f for f in base],
+                                        metadata=base.metadata)
+            table = pa.Table.from_pandas(df, schema=self.schema, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.path, self.schema)
+            self.writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="a" if self.rows else "w", header=not self.rows, index=False)
+        self.rows += len(df)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+def pick_column(columns, wanted, candidates):
+    if wanted:
+        return wanted
+    lower = {c.lower(): c for c in columns}
+    for c in candidates:
+        if c in lower:
+            return lower[c]
+    raise SystemExit(f"Could not find a column among {candidates}; pass --lat/--lon")
+
+def run(source: Path, out: Path, zips_gdf, roster, lat=None, lon=None, workers=WORKERS, chunk=CHUNK_ROWS, nearest_k=0):
+    zips_gdf = gpd.GeoDataFrame(zips_gdf[["zip", "geometry"]].reset_index(drop=True), crs=zips_gdf.crs)
+    owners = roster_owners(roster)
+    nearest = (NearestTechIndex(zips_gdf, roster), nearest_k) if nearest_k > 0 else None
+    writer = ChunkWriter(out)
+    stats = {"rows": 0, "matched": 0, "owned": 0}
+    pending = deque()
+
+    def drain_one():
+        df = pending.popleft().result()
+        writer.write(df)
+        stats["rows"] += len(df)
+        stats["matched"] += int(df["zip"].notna().sum())
+        stats["owned"] += int(df["tech_ids"].ne("").sum())
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(zips_gdf, owners, nearest)) as pool:
+        cols = None
+        for df in read_chunks(source, chunk):
+            if cols is None:
+                cols = (pick_column(df.columns, lat, LAT_COLS), pick_column(df.columns, lon, LON_COLS))
+            pending.append(pool.submit(_assign_chunk, (df, *cols)))
+            if len(pending) >= workers * 2:   # bounded memory: wait for the oldest chunk
+                drain_one()
+        while pending:
+            drain_one()
+    writer.close()
+    return stats
+
+def main():
+    ap = argparse.ArgumentParser(description="Assign job points to ZIPs and technicians in bulk.")
+    ap.add_argument("source", type=Path, help="CSV or Parquet with job lat/lon columns")
+    ap.add_argument("--roster", required=True, type=Path, help="roster JSON (DEFAULT_TECHS shape / roster_import.py output)")
+    ap.add_argument("--zips", help="local ZIP snapshot (default: fetch IL+IN from ArcGIS)")
+    ap.add_argument("--out", type=Path, help="output .csv or .parquet (default: <source>_assigned.<ext>)")
+    ap.add_argument("--lat")
+    ap.add_argument("--lon")
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    ap.add_argument("--chunk", type=int, default=CHUNK_ROWS)
+    ap.add_argument("--nearest", type=int, default=0, metavar="K", help="add the K nearest technicians for unowned jobs")
+    args = ap.parse_args()
+
+    out = args.out or args.source.with_name(f"{args.source.stem}_assigned{args.source.suffix}")
+    roster = json.loads(args.roster.read_text(encoding="utf-8"))
+    stats = run(args.source, out, load_zips(args.zips), roster, args.lat, args.lon, args.workers, args.chunk, args.nearest)
+    print(f"Assigned {stats['rows']} jobs -> {out}: {stats['matched']} inside a ZIP, "
+          f"{stats['owned']} owned by a technician, {stats['rows'] - stats['matched']} outside the ZIP dataset")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+// Times the planner page's JS geometry paths under Node with the same turf@6 build the page loads.
+// The functions are lifted by name from the page build_service_coverage_page.py emits and run in a vm
+// context, so this measures the page's current code: the typed-array store (buildStore), per-tech
+// computeTechUnion (unionMany + simplify), localSelect for rectangle/lasso/radius, rep points (labels)
+// and nearestTechs. Leaflet/DOM code is never loaded; a function the page no longer defines is an error.
+// Usage: node page_geometry.js page.html zips.geojson techs.json [repeat]   -> JSON timings (seconds) on stdout
+const fs = require("fs");
+const vm = require("vm");
+const turf = require("@turf/turf");
+
+const [pagePath, src, techsPath, repeatArg] = process.argv.slice(2);
+const repeat = Number(repeatArg || 3);
+
+const PAGE_CONSTS = ["GRID_DEG", "EARTH_MI", "NEAREST_OVERSAMPLE", "PREP_BANDS"];
+const PAGE_FUNCTIONS = ["geomParts", "buildStore", "gridCells", "storeCandidates", "forEachRing", "storeFeature",
+  "zipFeature", "storeContains", "storeRepPoint", "normalizeFeature", "unionMany", "computeTechUnion", "unitXYZ",
+  "repPoint", "buildNearestTree", "kdBuild", "kdWithin", "kdNearest", "nearestTechs", "buildSelectionIndex",
+  "preparePolygon", "prepContains", "segmentsCross", "prepCrosses", "prepIntersects", "localSelect"];
+
+// top-level declarations in the page script sit at two-space indent; multi-line bodies close on "  }"
+function pageDecl(script, re, name){
+  const m = re.exec(script);
+  if (!m) throw new Error(`page script no longer defines ${name}`);
+  const lines = script.slice(m.index).split("\n");
+  const open = s => (s.match(/\{/g) || []).length - (s.match(/\}/g) || []).length;
+  if (open(lines[0]) <= 0) return lines[0];
+  const end = lines.findIndex((l, k) => k > 0 && /^  \}/.test(l));
+  return lines.slice(0, end + 1).join("\n");
+}
+
+function loadPage(html){
+  const script = [...html.matchAll(/<script>([\s\S]*?)<\/script>/g)].map(m => m[1]).join("\n");
+  const decls = [
+    ...PAGE_CONSTS.map(n => pageDecl(script, new RegExp(`^  const ${n} =`, "m"), n)),
+    ...PAGE_FUNCTIONS.map(n => pageDecl(script, new RegExp(`^  (async )?function ${n}\\(`, "m"), n)),
+  ];
+  // page state the functions read, with API_BASE unset (the in-browser geometry paths)
+  const prelude = `var store, selIndex = null, nearestTree = null, nearestKey = "", TECHS = [];
+    const API_BASE = null, unionCache = new Map(), techCost = new Map(), repPointCache = new Map();
+    async function perfSpan(name, fn){ return fn(); }`;
+  const bridge = `({
+    load(features){ store = buildStore(features.map(normalizeFeature)); this.reset(); return store; },
+    reset(){ selIndex = null; nearestTree = null; unionCache.clear(); repPointCache.clear(); },
+    setTechs(techs){ TECHS = techs; nearestTree = null; },
+    get store(){ return store; },
+    computeTechUnion, unionMany, localSelect, repPoint, nearestTechs, buildSelectionIndex, buildNearestTree })`;
+  return vm.runInContext([prelude, ...decls, bridge].join("\n"), vm.createContext({ turf, console, performance }));
+}
+
+async function bestOf(fn, n = repeat, before = () => {}){
+  let best = Infinity, out;
+  for (let i = 0; i < n; i++) {
+    before();
+    const t0 = process.hrtime.bigint(); out = await fn(); best = Math.min(best, Number(process.hrtime.bigint() - t0) / 1e9);
+  }
+  return [best, out];
+}
+
+// job token as the scheduler hands it to page code; never cancelled here
+const tok = { cancelled: false, signal: null, check(){}, async yield(){}, progress(){} };
+
+(async () => {
+  const res = {};
+  const page = loadPage(fs.readFileSync(pagePath, "utf8"));
+  let fc;
+  [res.parse, fc] = await bestOf(() => JSON.parse(fs.readFileSync(src, "utf8")));
+  [res.build_store] = await bestOf(() => page.load(fc.features));
+
+  const techs = JSON.parse(fs.readFileSync(techsPath, "utf8"));
+  let unions;
+  [res.tech_unions, unions] = await bestOf(async () => {
+    const out = [];
+    for (const t of techs) out.push(await page.computeTechUnion(t, tok));
+    return out;
+  }, 1, () => page.reset());
+  [res.polygon_to_line] = await bestOf(() => unions.filter(Boolean).map(u => turf.polygonToLine(u)));
+
+  // selections over the middle quarter of the tiling, against a warm selection index
+  const [w, s, e, n] = turf.bbox(fc), cx = (w + e) / 2, cy = (s + n) / 2, dx = (e - w) / 8, dy = (n - s) / 8;
+  const rectPoly = turf.bboxPolygon([cx - dx, cy - dy, cx + dx, cy + dy]);
+  const lasso = turf.polygon([[[cx - dx, cy], [cx - dx / 2, cy + dy], [cx + dx, cy + dy / 2], [cx + dx / 2, cy - dy],
+                               [cx - dx / 2, cy - dy / 2], [cx - dx, cy]]]);
+  const drawn = (layerType, geojson) => ({ layerType, layer: { toGeoJSON: () => geojson } });
+  [res.selection_index] = await bestOf(() => page.buildSelectionIndex());
+  page.localSelect(drawn("rectangle", rectPoly));
+  let hits;
+  [res.rect_select, hits] = await bestOf(() => page.localSelect(drawn("rectangle", rectPoly)));
+  [res.lasso_select] = await bestOf(() => page.localSelect(drawn("polygon", lasso)));
+  const miles = turf.distance([cx, cy], [cx + dx, cy], { units: "miles" });
+  const circle = { layerType: "circle", layer: { getLatLng: () => ({ lng: cx, lat: cy }), getRadius: () => miles * 1609.344 } };
+  [res.radius_select] = await bestOf(() => page.localSelect(circle));
+  [res.rect_select_union] = await bestOf(() => page.unionMany(hits, 30, tok), 1);
+
+  const zips = page.store.zip;
+  [res.rep_point_labels] = await bestOf(() => zips.map(z => page.repPoint(z)), 1, () => page.reset());
+  page.setTechs(techs);
+  [res.nearest_tree] = await bestOf(() => page.buildNearestTree());
+  [res.nearest_techs] = await bestOf(() => { for (let k = 0; k < 500; k++) page.nearestTechs(w + (e - w) * (k % 25) / 25, s + (n - s) * Math.floor(k / 25) / 20, 3); });
+
+  process.stdout.write(JSON.stringify(res));
+})().catch(err => { console.error(err); process.exit(1); });
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# Times every build/geometry stage of map.py and build_service_coverage_page.py over synthetic ZIP
+# tilings, plus the page's own JS geometry code under Node, and stores the results as JSON.
+#
+# Usage: python benchmarks/run_benchmarks.py [--sizes 500,2000,10000,40000] [--vertices 240]
+#                                            [--compare benchmarks/results/<older>.json]
+#        (JS stages need `npm install --prefix benchmarks` first; they are skipped otherwise)
+
+import argparse
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parent))
+
+import folium
+
+import build_service_coverage_page as page
+import map as zipmap
+from territories import territory_union, zip_positions
+from synthetic_zips import synthetic_roster, synthetic_zips
+
+# ---------------------- SETTINGS ----------------------
+SIZES        = [500, 2000, 10000, 40000]
+VERTICES     = 240      # per polygon; real IL/IN ZIPs are mostly 100-1000
+INVALID_FRAC = 0.02     # share of self-intersecting polygons (exercises the repair stage)
+REPEAT       = 3        # best-of-N per stage
+SIMPLIFY     = 0.0005
+REGRESSION   = 1.10     # flag stages >10% slower than the compared run
+RESULTS_DIR  = HERE / "results"
+# ------------------------------------------------------
+
+def best_of(fn, repeat):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+def bench_python(n, vertices, repeat, tmp: Path):
+    gdf = synthetic_zips(n, vertices, INVALID_FRAC, seed=n)
+    src = tmp / f"zips_{n}.geojson"
+    src.write_text(json.dumps(gdf.rename(columns={"zip": "ZIP_CODE", "city": "PO_NAME"}).__geo_interface__))
+    techs = synthetic_roster(gdf, techs=50, zips_per_tech=min(40, n // 10), seed=n)
+    res = {}
+
+    # load_state = read + rename + CRS only; clean and simplify are timed as their own stages
+    saved = zipmap.CLEAN_GEOM, zipmap.SIMPLIFY_TOL
+    zipmap.CLEAN_GEOM, zipmap.SIMPLIFY_TOL = False, 0.0
+    try:
+        res["load_state"], loaded = best_of(lambda: zipmap.load_state(str(src)), repeat)
+    finally:
+        zipmap.CLEAN_GEOM, zipmap.SIMPLIFY_TOL = saved
+    res["clean_buffer0"], _ = best_of(lambda: loaded.buffer(0), repeat)   # the old blanket clean, for reference
+    res["clean_repair"], cleaned = best_of(lambda: zipmap.clean_geometries(loaded.copy())[0], repeat)
+    res["simplify"], _ = best_of(lambda: zipmap.simplify_geometries(cleaned.copy(), SIMPLIFY), repeat)
+    res["geo_interface"], gi = best_of(lambda: cleaned.__geo_interface__, repeat)
+    res["geojson_dumps"], _ = best_of(lambda: json.dumps(gi), repeat)
+    res["labels"], _ = best_of(lambda: zipmap.add_zip_labels(folium.Map(), cleaned), 1)
+    res["folium_geojson_layer"], _ = best_of(lambda: zipmap.add_zip_layer(folium.Map(), cleaned), 1)
+
+    # unions need valid input, same as the real pipeline (clean runs before anything else)
+    pos = zip_positions(cleaned)
+    res["territory_unions"], _ = best_of(lambda: [territory_union(cleaned, pos, t["zips"]) for t in techs], repeat)
+    res["page_render_html"], _ = best_of(lambda: page.render_html(techs), repeat)
+    return res, src, techs
+
+def bench_js(src: Path, techs, repeat) -> dict:
+    node = shutil.which("node")
+    if not node or not (HERE / "node_modules" / "@turf" / "turf").exists():
+        return {"skipped": "node or benchmarks/node_modules/@turf/turf missing"}
+    roster = src.with_suffix(".techs.json")
+    roster.write_text(json.dumps(techs))
+    html = src.with_suffix(".page.html")   # page_geometry.js runs this page's own JS
+    html.write_text(page.render_html(techs), encoding="utf-8")
+    out = subprocess.run([node, str(HERE / "page_geometry.js"), str(html), str(src), str(roster), str(repeat)],
+                         capture_output=True, text=True, check=True)
+    return json.loads(out.stdout)
+
+def compare(cur: dict, old_path: Path):
+    old = json.loads(old_path.read_text())["results"]
+    worse = []
+    print(f"\n{'size':>6}  {'stage':<28}{'old s':>10}{'new s':>10}{'ratio':>8}")
+    for size, stages in cur.items():
+        for stage, t in stages.items():
+            o = old.get(size, {}).get(stage)
+            if not isinstance(t, (int, float)) or not isinstance(o, (int, float)) or o <= 0:
+                continue
+            ratio = t / o
+            flag = "  <-- slower" if ratio > REGRESSION else ""
+            print(f"{size:>6}  {stage:<28}{o:>10.4f}{t:>10.4f}{ratio:>8.2f}{flag}")
+            if flag:
+                worse.append((size, stage, ratio))
+    return worse
+
+def git_rev():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=HERE.parent).stdout.strip()
+    except OSError:
+        return ""
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark ZIP build/geometry stages on synthetic tilings.")
+    ap.add_argument("--sizes", default=",".join(map(str, SIZES)))
+    ap.add_argument("--vertices", type=int, default=VERTICES)
+    ap.add_argument("--repeat", type=int, default=REPEAT)
+    ap.add_argument("--out", type=Path, help="result JSON (default: benchmarks/results/<timestamp>.json)")
+    ap.add_argument("--compare", type=Path, help="earlier result JSON to compare against")
+    ap.add_argument("--no-js", action="store_true")
+    args = ap.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (int(s) for s in args.sizes.split(",")):
+            print(f"[{n} ZIPs x {args.vertices} vertices]")
+            res, src, techs = bench_python(n, args.vertices, args.repeat, Path(tmp))
+            if not args.no_js:
+                for k, v in bench_js(src, techs, args.repeat).items():
+                    res[f"js_{k}"] = v
+            for k, v in res.items():
+                print(f"  {k:<28}{v:>10.4f}s" if isinstance(v, float) else f"  {k:<28}{v}")
+            results[str(n)] = res
+
+    doc = {"meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "git": git_rev(), "python": platform.python_version(),
+                    "machine": platform.machine(), "vertices": args.vertices, "repeat": args.repeat},
+           "results": results}
+    out = args.out or RESULTS_DIR / f"{time.strftime('%Y%m%d-%H%M%S')}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(doc, indent=1))
+    print(f"Wrote {out}")
+    if args.compare and compare(results, args.compare):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
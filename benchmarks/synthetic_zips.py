@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# Synthetic ZIP-like tilings for benchmarks: a jittered lattice whose cells share exactly the same
+# wiggly border vertices with their neighbours (like real USPS-aligned ZIPs), with a configurable
+# vertex count per polygon and an optional share of self-intersecting (invalid) polygons.
+
+import math
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+ORIGIN = (-91.5, 37.0)   # lower-left of IL/IN, so coordinates look like the real data
+CELL   = 0.08            # degrees; roughly a rural ZIP
+
+def _wiggle(p0, p1, t, rng, amp):
+    # interior points of an edge p0->p1, pushed sideways by a smooth random curve (zero at both ends)
+    d = p1 - p0
+    normal = np.stack([-d[..., 1], d[..., 0]], axis=-1)
+    normal /= np.maximum(np.linalg.norm(normal, axis=-1, keepdims=True), 1e-12)
+    shape = d.shape[:-1]
+    a = rng.uniform(-1, 1, shape + (3,))
+    ph = rng.uniform(0, 2 * np.pi, shape + (3,))
+    k = np.array([1, 2, 3])
+    wave = (a[..., None, :] * np.sin(np.pi * k * t[:, None] + ph[..., None, :])).sum(-1) / 3
+    off = amp * np.sin(np.pi * t) * wave
+    return p0[..., None, :] + d[..., None, :] * t[:, None] + normal[..., None, :] * off[..., None]
+
+def synthetic_zips(n: int, vertices: int = 240, invalid_frac: float = 0.0, seed: int = 0) -> gpd.GeoDataFrame:
+    rng = np.random.default_rng(seed)
+    nx = math.ceil(math.sqrt(n))
+    ny = math.ceil(n / nx)
+    m = max(vertices // 4 - 1, 1)           # interior vertices per cell edge
+    t = np.linspace(0, 1, m + 2)[1:-1]
+
+    jj, ii = np.mgrid[0:ny + 1, 0:nx + 1]
+    corners = np.stack([ORIGIN[0] + CELL * (ii + rng.uniform(-0.3, 0.3, ii.shape)),
+                        ORIGIN[1] + CELL * (jj + rng.uniform(-0.3, 0.3, jj.shape))], axis=-1)
+    amp = CELL * 0.06
+    horiz = _wiggle(corners[:, :-1], corners[:, 1:], t, rng, amp)   # (ny+1, nx, m, 2)
+    vert = _wiggle(corners[:-1, :], corners[1:, :], t, rng, amp)    # (ny, nx+1, m, 2)
+
+    c = corners[..., None, :]
+    ring = np.concatenate([
+        c[:-1, :-1], horiz[:-1], c[:-1, 1:], vert[:, 1:],
+        c[1:, 1:], horiz[1:, :, ::-1], c[1:, :-1], vert[:, :-1, ::-1], c[:-1, :-1],
+    ], axis=2).reshape(ny * nx, -1, 2)[:n]
+
+    if invalid_frac > 0:
+        # swap two far-apart vertices -> bow-tie self-intersection
+        bad = rng.choice(n, size=max(1, int(n * invalid_frac)), replace=False)
+        a, b = 1, ring.shape[1] // 2
+        ring[bad, a], ring[bad, b] = ring[bad, b].copy(), ring[bad, a].copy()
+
+    idx = np.arange(n)
+    return gpd.GeoDataFrame({
+        "zip": [f"{60000 + i:05d}" for i in idx],
+        "city": [f"Synthetic {i // 25}" for i in idx],
+        "STATE": np.where(idx % nx < nx // 2, "IL", "IN"),
+    }, geometry=shapely.polygons(ring), crs="EPSG:4326")
+
+def synthetic_roster(gdf: gpd.GeoDataFrame, techs: int = 50, zips_per_tech: int = 40, seed: int = 0) -> list:
+    # contiguous-ish territories: consecutive ZIP blocks starting at random cells
+    rng = np.random.default_rng(seed)
+    codes = gdf["zip"].tolist()
+    out = []
+    for i in range(techs):
+        start = int(rng.integers(0, max(len(codes) - zips_per_tech, 1)))
+        out.append({"id": i + 1, "name": f"Tech {i + 1}", "contact": "", "zips": codes[start:start + zips_per_tech]})
+    return out
@@ -1,8 +1,11 @@
 #!/usr/bin/env python3
 # Writes a complete web app (service_areas.html) for planning technician ZIP coverage.
 from pathlib import Path
+import argparse
 import json
 
+import tracing
+
 OUT = Path("service_areas.html")
 DEFAULT_TECHS = [
   {
@@ -180,7 +183,7 @@ html_template = r"""<!doctype html>
     .leaflet-draw-toolbar a:hover { background:#0e1530 !important; border-color:#2a3a62 !important; }
     .leaflet-draw-actions a { background:#0e1530 !important; color:#e5e7eb !important; border:1px solid var(--border) !important; }
 
-    /* Rectangle icon inside the draw button (themed) */
+    /* Rectangle / lasso / radius icons inside the draw buttons (themed) */
     .leaflet-draw-draw-rectangle { position: relative; }
     .leaflet-draw-draw-rectangle::before {
       content: ""; position: absolute; top: 50%; left: 50%; transform: translate(-50%, -50%);
@@ -188,6 +191,14 @@ html_template = r"""<!doctype html>
       box-shadow: inset 0 0 0 1px rgba(255,255,255,0.08); pointer-events: none;
     }
     .leaflet-draw-draw-rectangle:hover::before { border-color: #60a5fa; }
+    .leaflet-draw-draw-polygon, .leaflet-draw-draw-circle { position: relative; }
+    .leaflet-draw-draw-polygon::before, .leaflet-draw-draw-circle::before {
+      content: ""; position: absolute; top: 50%; left: 50%; width: 12px; height: 12px;
+      border: 2px solid var(--accent); pointer-events: none;
+    }
+    .leaflet-draw-draw-polygon::before { transform: translate(-50%, -50%) rotate(45deg) skew(12deg, 12deg); border-radius: 2px; }
+    .leaflet-draw-draw-circle::before { transform: translate(-50%, -50%); border-radius: 50%; }
+    .leaflet-draw-draw-polygon:hover::before, .leaflet-draw-draw-circle:hover::before { border-color: #60a5fa; }
 
     /* Busy overlay */
     #busy { position:absolute; top:50%; left:50%; transform:translate(-50%,-50%);
@@ -205,6 +216,14 @@ html_template = r"""<!doctype html>
       box-shadow:0 0 0 2px rgba(255,255,255,0.70); white-space:nowrap;
     }
 
+    /* Perf debug panel */
+    .perf-panel { position:absolute; bottom:10px; right:10px; z-index:9999; background:rgba(17,22,42,0.96); border:1px solid var(--border);
+      border-radius:10px; padding:8px 10px; font-size:11px; width:340px; max-height:45vh; overflow:auto; box-shadow:0 10px 30px rgba(0,0,0,.45); }
+    .perf-panel h4 { margin:4px 0; font-size:12px; }
+    .perf-panel table { width:100%; border-collapse:collapse; }
+    .perf-panel td { padding:1px 4px; border-bottom:1px solid var(--border); white-space:nowrap; }
+    .perf-panel td.num { text-align:right; font-variant-numeric:tabular-nums; }
+
     .legend { position:absolute; bottom:10px; left:10px; z-index:9999; background:rgba(17,22,42,0.96); border:1px solid var(--border); border-radius:10px; padding:8px 10px; font-size:12px; }
     a { color:var(--accent); text-decoration:none; }
   </style>
@@ -220,7 +239,7 @@ html_template = r"""<!doctype html>
       <div class="search">
         <input id="techSearch" placeholder="Search technicians or ZIPs..." />
       </div>
-      <div class="tiny">Click a tech to highlight their service area. Draw a rectangle on the map to list ZIPs and outline the union perimeter.</div>
+      <div class="tiny">Click a tech to highlight their service area. Draw a rectangle, freehand polygon or radius circle on the map to list ZIPs and outline the union perimeter.</div>
 
       <div class="adder">
         <div class="row"><input id="addName" placeholder="Technician name" /></div>
@@ -230,6 +249,10 @@ html_template = r"""<!doctype html>
           <button id="addTech" class="btn-primary btn">Add Technician</button>
           <div id="addMsg" class="msg"></div>
         </div>
+        <div class="row">
+          <button id="importRosterBtn" class="btn">Import Roster JSON</button>
+          <input id="importRoster" type="file" accept=".json,application/json" hidden />
+        </div>
       </div>
 
       <div id="techList" class="tech-list"></div>
@@ -243,6 +266,7 @@ html_template = r"""<!doctype html>
           <button id="toggleLabels" class="btn">Toggle Labels</button>
           <button id="toggleAllTerritories" class="btn">Show All Territories</button>
           <button id="resetTechs" class="btn">Reset Demo Data</button>
+          <button id="togglePerf" class="btn" hidden>Perf</button>
         </div>
       </div>
       <div class="content">
@@ -250,7 +274,7 @@ html_template = r"""<!doctype html>
 
         <div id="selectionPanel" class="selection-panel" hidden>
           <h3>Selected ZIPs</h3>
-          <div class="small">Drag a rectangle to select an area on the map.</div>
+          <div class="small">Draw a rectangle, polygon or circle to select an area on the map.</div>
           <ul id="zipList"></ul>
           <div class="row">
             <button id="copyZips" class="btn">Copy ZIPs</button>
@@ -264,6 +288,12 @@ html_template = r"""<!doctype html>
           <span class="dot" style="display:inline-block;width:6px;height:6px;background:#7dd3fc;border-radius:50%;margin:0 2px;animation:bl 1.2s infinite .15s"></span>
           <span class="dot" style="display:inline-block;width:6px;height:6px;background:#7dd3fc;border-radius:50%;margin:0 2px;animation:bl 1.2s infinite .3s"></span>
           <span id="busyMsg" style="margin-left:6px">Processing…</span>
+          <button id="busyCancel" class="btn" style="margin-left:10px;padding:2px 8px">Cancel</button>
+        </div>
+
+        <div id="perfPanel" class="perf-panel" hidden>
+          <h4>Recent stages</h4><table id="perfSpans"></table>
+          <h4>Per-technician union cost</h4><table id="perfTechs"></table>
         </div>
 
         <div class="legend" id="legendBox">
@@ -279,15 +309,300 @@ html_template = r"""<!doctype html>
   // ------------------- Default technicians (injected from Python) -------------------
   /*__DEFAULT_TECHS__*/
 
+  // Optional local geometry API (zip_api_server.py); null = fetch ArcGIS and compute in the browser
+  const API_BASE = /*__API_BASE__*/null;
+  async function apiGet(path, signal){ const r = await fetch(API_BASE + path, { signal }); if (!r.ok) throw new Error(`API ${path}: ${r.status}`); return r.json(); }
+  async function apiPost(path, body, signal){ const r = await fetch(API_BASE + path, { method:"POST", headers:{ "Content-Type":"application/json" }, body: JSON.stringify(body), signal }); if (!r.ok) throw new Error(`API ${path}: ${r.status}`); return r.json(); }
+  function apiFeature(geom){ return geom ? { type:"Feature", properties:{}, geometry: geom } : null; }
+
+  // ------------------- Territory metrics (territory_metrics.py, embedded with --metrics) -------------------
+  // Keyed by ZIP-set hash (sha1 of the sorted, comma-joined ZIPs), so an edited territory simply has no entry.
+  const TERRITORY_METRICS = /*__TERRITORY_METRICS__*/{};
+  const metricKeys = new Map();
+  async function zipSetKey(zips){
+    const text = [...new Set(zips.map(z => String(z).trim()).filter(Boolean))].sort().join(",");
+    if (!metricKeys.has(text)) {
+      const buf = await crypto.subtle.digest("SHA-1", new TextEncoder().encode(text));
+      metricKeys.set(text, Array.from(new Uint8Array(buf), b => b.toString(16).padStart(2, "0")).join(""));
+    }
+    return metricKeys.get(text);
+  }
+  async function techMetrics(t){
+    if (!Object.keys(TERRITORY_METRICS).length || !(window.crypto && crypto.subtle)) return null;
+    try { return TERRITORY_METRICS[await zipSetKey(t.zips)] || null; } catch { return null; }
+  }
+  function metricsText(m){
+    const parts = [`${m.area_sq_mi.toFixed(0)} sq mi`, `${m.perimeter_mi.toFixed(0)} mi perimeter`, `PP ${m.polsby_popper.toFixed(2)}`,
+      `${m.zip_count} ZIPs`, m.components > 1 ? `${m.components} separate parts` : "contiguous"];
+    if (m.overlap_zips) parts.push(`${m.overlap_pct.toFixed(0)}% overlap (${m.overlap_zips} ZIPs)`);
+    return parts.join(" · ");
+  }
+  function fillMetrics(el, t, short=false){
+    techMetrics(t).then(m => {
+      if (!m) { el.remove(); return; }
+      el.textContent = short ? `${m.area_sq_mi.toFixed(0)} sq mi · PP ${m.polsby_popper.toFixed(2)}${m.components > 1 ? ` · ${m.components} parts` : ""}` : metricsText(m);
+      el.title = "Polsby-Popper compactness: 1 = circle, near 0 = stringy. Overlap is as of the page build.";
+    });
+  }
+
   // State & persistence
   const STORAGE_KEY = "svc_techs_v1";
+  const VERSION_KEY = STORAGE_KEY + ":version";   // last roster version seen from ROSTER_API
+  const PENDING_KEY = STORAGE_KEY + ":pending";   // edits made while the roster API was unreachable
   let TECHS = [];
+  let rosterVersion = 0;
   function loadTechs() {
+    try { rosterVersion = Number(localStorage.getItem(VERSION_KEY) || 0) || 0; } catch {}
     try { const s = localStorage.getItem(STORAGE_KEY); if (s) { const arr = JSON.parse(s); if (Array.isArray(arr)) return arr; } } catch {}
-    return DEFAULT_TECHS;
+    rosterVersion = 0;
+    return DEFAULT_TECHS.slice();
+  }
+  // localStorage is only an offline cache: coalesce bursts of edits into one write
+  let saveTimer = null;
+  function saveTechs() {
+    if (saveTimer) return;
+    saveTimer = setTimeout(() => {
+      saveTimer = null;
+      try { localStorage.setItem(STORAGE_KEY, JSON.stringify(TECHS)); localStorage.setItem(VERSION_KEY, String(rosterVersion)); } catch {}
+    }, 250);
+  }
+  async function resetTechs() {
+    if (ROSTER_API) { rosterVersion = 0; await syncRoster(); }
+    else { TECHS = DEFAULT_TECHS.slice(); saveTechs(); }
+    renderTechList(techSearch.value); if (allTerritoriesOn) buildAllTerritories();
+  }
+
+  // ------------------- Shared roster (roster_store.py), delta sync -------------------
+  const ROSTER_API = /*__ROSTER_API__*/null;
+  function loadPending(){ try { return JSON.parse(localStorage.getItem(PENDING_KEY) || "[]"); } catch { return []; } }
+  function savePending(ops){ try { localStorage.setItem(PENDING_KEY, JSON.stringify(ops)); } catch {} }
+
+  async function sendOp(op){
+    const r = op.del
+      ? await fetch(`${ROSTER_API}/roster/${op.id}`, { method:"DELETE" })
+      : await fetch(`${ROSTER_API}/roster`, { method:"POST", headers:{ "Content-Type":"application/json" }, body: JSON.stringify(op.techs ? { techs: op.techs } : op.tech) });
+    if (!r.ok && r.status !== 404) throw new Error(`roster ${r.status}`);
+  }
+  async function flushPending(){
+    const ops = loadPending();
+    while (ops.length) { await sendOp(ops[0]); ops.shift(); savePending(ops); }
+  }
+  // Queue one technician change; only that technician goes over the wire
+  async function pushTech(tech){ if (ROSTER_API) await pushOps([{ tech: { id: tech.id, name: tech.name, contact: tech.contact, zips: tech.zips } }]); }
+  async function pushDelete(id){ if (ROSTER_API) await pushOps([{ id, del: true }]); }
+  async function pushOps(newOps){
+    const ops = loadPending(); ops.push(...newOps); savePending(ops);
+    if (await syncRoster()) { renderTechList(techSearch.value); if (allTerritoriesOn) buildAllTerritories(); }
+  }
+
+  // Pull only changes newer than rosterVersion; returns true when TECHS changed
+  async function syncRoster(){
+    if (!ROSTER_API) return false;
+    try {
+      await flushPending();
+      const r = await fetch(`${ROSTER_API}/roster?since=${rosterVersion}`);
+      if (!r.ok) throw new Error(`roster ${r.status}`);
+      const d = await r.json();
+      if (d.version === rosterVersion && !d.changes.length) return false;
+      const strip = t => ({ id: t.id, name: t.name, contact: t.contact || "", zips: t.zips || [] });
+      if (d.full) TECHS = d.changes.filter(t => !t.deleted).map(strip);
+      else {
+        const byId = new Map(TECHS.map(t => [t.id, t]));
+        d.changes.forEach(c => { if (c.deleted) byId.delete(c.id); else byId.set(c.id, strip(c)); });
+        TECHS = Array.from(byId.values());
+      }
+      rosterVersion = d.version;
+      saveTechs();
+      return true;
+    } catch(e) { console.warn("Roster sync failed; using offline cache", e); return false; }
+  }
+  if (ROSTER_API) {
+    const resync = async () => { if (await syncRoster()) { renderTechList(techSearch.value); if (allTerritoriesOn) buildAllTerritories(); } };
+    setInterval(resync, 30000);
+    window.addEventListener("focus", resync);
+  }
+
+  // ------------------- Perf instrumentation (performance.mark/measure, optional debug panel) -------------------
+  // Open with ?debug in the URL (or build with --debug). Spans also show up in DevTools > Performance > Timings.
+  const PERF_DEBUG = /*__PERF_DEBUG__*/false || new URLSearchParams(location.search).has("debug");
+  const perfSpans = [];          // most recent first: { name, ms, detail }
+  const techCost = new Map();    // tech id -> { name, zips, ms, runs }
+  let perfSeq = 0;
+  async function perfSpan(name, fn, detail){
+    const start = `${name}#${++perfSeq}`, t0 = performance.now();
+    performance.mark(start);
+    try { return await fn(); }
+    finally {
+      const ms = performance.now() - t0;
+      try { performance.measure(name, { start, detail }); } catch { try { performance.measure(name, start); } catch {} }
+      performance.clearMarks(start);
+      perfSpans.unshift({ name, ms, detail }); if (perfSpans.length > 40) perfSpans.pop();
+      renderPerfPanel();
+    }
+  }
+  function perfRow(cells){ const tr = document.createElement("tr"); cells.forEach(([v, num]) => { const td = document.createElement("td"); td.textContent = v; if (num) td.className = "num"; tr.appendChild(td); }); return tr; }
+  function renderPerfPanel(){
+    const panel = document.getElementById("perfPanel");
+    if (!panel || panel.hidden) return;
+    const spans = document.getElementById("perfSpans"), techs = document.getElementById("perfTechs");
+    spans.innerHTML = ""; techs.innerHTML = "";
+    perfSpans.forEach(p => spans.appendChild(perfRow([[p.name], [p.detail && p.detail.label || ""], [p.ms.toFixed(1) + " ms", true]])));
+    Array.from(techCost.values()).sort((a, b) => b.ms - a.ms)
+      .forEach(c => techs.appendChild(perfRow([[c.name], [`${c.zips} ZIPs`, true], [c.ms.toFixed(1) + " ms", true], [`×${c.runs}`, true]])));
+  }
+  if (PERF_DEBUG) {
+    const btn = document.getElementById("togglePerf"), panel = document.getElementById("perfPanel");
+    btn.hidden = false; panel.hidden = false;
+    btn.addEventListener("click", () => { panel.hidden = !panel.hidden; renderPerfPanel(); });
+  }
+
+  // ------------------- Feature store (flat typed arrays) -------------------
+  // Every ZIP vertex lives in one Float32Array of lon/lat pairs. ringStart / polyStart / featStart are
+  // offsets (each with a trailing sentinel): feature i owns parts featStart[i]..featStart[i+1], part p owns
+  // rings polyStart[p].., ring r owns vertices ringStart[r]... Properties are parallel arrays, rowOf maps
+  // ZIP -> row and a coarse bbox grid answers point/area lookups. GeoJSON is only rebuilt on demand.
+  const GRID_DEG = 0.1;
+  let store = buildStore([]);
+
+  function geomParts(g){ return !g ? [] : g.type === "MultiPolygon" ? g.coordinates : g.type === "Polygon" ? [g.coordinates] : []; }
+
+  function buildStore(features){
+    let nv = 0, nr = 0, np = 0;
+    features.forEach(f => geomParts(f.geometry).forEach(p => { np++; p.forEach(r => { nr++; nv += r.length; }); }));
+    const n = features.length;
+    const st = { n, coords: new Float32Array(2*nv), ringStart: new Uint32Array(nr+1), polyStart: new Uint32Array(np+1),
+      featStart: new Uint32Array(n+1), bbox: new Float32Array(4*n), zip: new Array(n), city: new Array(n), state: new Array(n),
+      rowOf: new Map(), grid: new Map() };
+    let v = 0, r = 0, p = 0;
+    features.forEach((f, i) => {
+      st.featStart[i] = p;
+      let w = Infinity, s = Infinity, e = -Infinity, nn = -Infinity;
+      geomParts(f.geometry).forEach(poly => {
+        st.polyStart[p++] = r;
+        poly.forEach(ring => {
+          st.ringStart[r++] = v;
+          ring.forEach(c => { st.coords[2*v] = c[0]; st.coords[2*v+1] = c[1]; v++; if (c[0] < w) w = c[0]; if (c[0] > e) e = c[0]; if (c[1] < s) s = c[1]; if (c[1] > nn) nn = c[1]; });
+        });
+      });
+      st.bbox.set([w, s, e, nn], 4*i);
+      const pr = f.properties || {};
+      st.zip[i] = String(pr.zip || ""); st.city[i] = pr.city || ""; st.state[i] = pr.STATE || "";
+      if (st.zip[i] && !st.rowOf.has(st.zip[i])) st.rowOf.set(st.zip[i], i);
+      if (w <= e) gridCells([w, s, e, nn], k => { if (!st.grid.has(k)) st.grid.set(k, []); st.grid.get(k).push(i); });
+    });
+    st.featStart[n] = p; st.polyStart[np] = r; st.ringStart[nr] = v;
+    return st;
+  }
+
+  function gridCells([w, s, e, n], fn){
+    for (let gx = Math.floor(w / GRID_DEG); gx <= Math.floor(e / GRID_DEG); gx++)
+      for (let gy = Math.floor(s / GRID_DEG); gy <= Math.floor(n / GRID_DEG); gy++) fn(gx + ":" + gy);
+  }
+
+  // rows whose bbox overlaps [w, s, e, n]
+  function storeCandidates(bb){
+    const out = new Set(), B = store.bbox;
+    gridCells(bb, k => (store.grid.get(k) || []).forEach(i => { if (B[4*i+2] >= bb[0] && B[4*i] <= bb[2] && B[4*i+3] >= bb[1] && B[4*i+1] <= bb[3]) out.add(i); }));
+    return [...out];
   }
-  function saveTechs() { try { localStorage.setItem(STORAGE_KEY, JSON.stringify(TECHS)); } catch {} }
-  function resetTechs() { TECHS = DEFAULT_TECHS.slice(); saveTechs(); renderTechList(techSearch.value); if (allTerritoriesOn) buildAllTerritories(); }
+
+  function forEachRing(i, fn){
+    for (let p = store.featStart[i]; p < store.featStart[i+1]; p++)
+      for (let r = store.polyStart[p]; r < store.polyStart[p+1]; r++) fn(store.ringStart[r], store.ringStart[r+1], r === store.polyStart[p]);
+  }
+
+  function storeFeature(i){
+    const C = store.coords, parts = [];
+    for (let p = store.featStart[i]; p < store.featStart[i+1]; p++) {
+      const rings = [];
+      for (let r = store.polyStart[p]; r < store.polyStart[p+1]; r++) {
+        const ring = [];
+        for (let v = store.ringStart[r]; v < store.ringStart[r+1]; v++) ring.push([C[2*v], C[2*v+1]]);
+        rings.push(ring);
+      }
+      parts.push(rings);
+    }
+    return { type:"Feature", properties:{ zip: store.zip[i], city: store.city[i], STATE: store.state[i] },
+      geometry: parts.length === 1 ? { type:"Polygon", coordinates: parts[0] } : { type:"MultiPolygon", coordinates: parts } };
+  }
+  function zipFeature(zip){ const i = store.rowOf.get(zip); return i === undefined ? null : storeFeature(i); }
+
+  // even-odd point-in-polygon straight off the buffers (holes and multipart ZIPs included)
+  function storeContains(i, x, y){
+    const B = store.bbox, C = store.coords;
+    if (x < B[4*i] || x > B[4*i+2] || y < B[4*i+1] || y > B[4*i+3]) return false;
+    let inside = false;
+    forEachRing(i, (a, b) => {
+      for (let v = a + 1; v < b; v++) {
+        const x1 = C[2*v-2], y1 = C[2*v-1], x2 = C[2*v], y2 = C[2*v+1];
+        if ((y1 > y) !== (y2 > y) && x < (x2 - x1) * (y - y1) / (y2 - y1) + x1) inside = !inside;
+      }
+    });
+    return inside;
+  }
+  function zipAt(lon, lat){ return storeCandidates([lon, lat, lon, lat]).find(i => storeContains(i, lon, lat)) ?? -1; }
+
+  // area-weighted centroid of the largest part (shoelace on the buffers); falls back to turf.pointOnFeature
+  // when that lands outside the ZIP. w = area in km² (relative weights for territory centroids).
+  function storeRepPoint(i){
+    const C = store.coords; let best = null;
+    forEachRing(i, (a, b, outer) => {
+      if (!outer) return;
+      let A = 0, cx = 0, cy = 0;
+      for (let v = a + 1; v < b; v++) { const k = C[2*v-2]*C[2*v+1] - C[2*v]*C[2*v-1]; A += k; cx += (C[2*v-2] + C[2*v]) * k; cy += (C[2*v-1] + C[2*v+1]) * k; }
+      if (A && (!best || Math.abs(A) > Math.abs(best.A))) best = { A, c: [cx / (3*A), cy / (3*A)] };
+    });
+    if (!best) return null;
+    let c = best.c;
+    if (!storeContains(i, c[0], c[1])) { try { c = turf.pointOnFeature(storeFeature(i)).geometry.coordinates; } catch {} }
+    return { c, w: Math.abs(best.A) / 2 * 111.32 * 111.32 * Math.cos(c[1] * Math.PI / 180) };
+  }
+
+  // All ZIPs drawn onto one canvas from the buffers (no per-ZIP Leaflet layers). Redrawn on move/zoom,
+  // culled by bbox, with sub-half-pixel vertices skipped.
+  const ZipCanvasLayer = L.Layer.extend({
+    initialize(style){ this._style = style; },
+    onAdd(map){
+      this._canvas = L.DomUtil.create("canvas", "leaflet-zoom-hide");
+      this._canvas.style.pointerEvents = "none";
+      map.getPanes().overlayPane.appendChild(this._canvas);
+      map.on("moveend zoomend resize viewreset", this.redraw, this);
+      this.redraw();
+    },
+    onRemove(map){ L.DomUtil.remove(this._canvas); map.off("moveend zoomend resize viewreset", this.redraw, this); },
+    setStyle(style){ this._style = Object.assign({}, this._style, style); this.redraw(); return this; },
+    getBounds(){
+      const B = store.bbox; let w = Infinity, s = Infinity, e = -Infinity, n = -Infinity;
+      for (let i = 0; i < store.n; i++) if (B[4*i] <= B[4*i+2]) { w = Math.min(w, B[4*i]); s = Math.min(s, B[4*i+1]); e = Math.max(e, B[4*i+2]); n = Math.max(n, B[4*i+3]); }
+      return w <= e ? L.latLngBounds([s, w], [n, e]) : L.latLngBounds([]);
+    },
+    redraw(){
+      const map = this._map; if (!map) return this;
+      const size = map.getSize(), dpr = window.devicePixelRatio || 1, cv = this._canvas;
+      L.DomUtil.setPosition(cv, map.containerPointToLayerPoint([0, 0]));
+      cv.width = size.x * dpr; cv.height = size.y * dpr; cv.style.width = size.x + "px"; cv.style.height = size.y + "px";
+      const ctx = cv.getContext("2d"); ctx.setTransform(dpr, 0, 0, dpr, 0, 0);
+      const z = map.getZoom(), scale = 256 * Math.pow(2, z), o = map.project(map.containerPointToLatLng([0, 0]), z);
+      const b = map.getBounds(), C = store.coords, D2R = Math.PI / 180;
+      ctx.beginPath();
+      storeCandidates([b.getWest(), b.getSouth(), b.getEast(), b.getNorth()]).forEach(i => forEachRing(i, (a, e) => {
+        let lx = 0, ly = 0;
+        for (let v = a; v < e; v++) {
+          const sn = Math.sin(C[2*v+1] * D2R);
+          const x = (C[2*v] + 180) / 360 * scale - o.x, y = (0.5 - Math.log((1 + sn) / (1 - sn)) / (4 * Math.PI)) * scale - o.y;
+          if (v === a) ctx.moveTo(x, y);
+          else if (v === e - 1 || Math.abs(x - lx) + Math.abs(y - ly) >= 0.5) ctx.lineTo(x, y);
+          else continue;
+          lx = x; ly = y;
+        }
+        ctx.closePath();
+      }));
+      const st = this._style;
+      ctx.globalAlpha = st.fillOpacity; ctx.fillStyle = st.fillColor; ctx.fill("evenodd");
+      ctx.globalAlpha = st.opacity ?? 1; ctx.strokeStyle = st.color; ctx.lineWidth = st.weight; ctx.stroke();
+      return this;
+    }
+  });
 
   // ------------------- Map Setup -------------------
   const map = L.map("map", { zoomSnap: 0.5 }).setView([41.5, -88.0], 8);
@@ -295,13 +610,25 @@ html_template = r"""<!doctype html>
     attribution: '&copy; <a href="https://www.openstreetmap.org/copyright">OSM</a> &copy; <a href="https://carto.com/attributions">CARTO</a>'
   }).addTo(map);
 
-  const zipLayer = L.geoJSON(null, {
-    style: () => ({ fillColor:"#8ecae6", color:"#2b344d", weight:0.6, fillOpacity:0.10 }),
-    onEachFeature: (feature, layer) => {
-      const p = feature.properties;
-      layer.bindTooltip(`<b>${p.zip}</b> — ${p.city}, ${p.STATE}`, {direction:"top"});
-    }
-  }).addTo(map);
+  const zipLayer = new ZipCanvasLayer({ fillColor:"#8ecae6", color:"#2b344d", weight:0.6, fillOpacity:0.10 }).addTo(map);
+
+  // hover tooltip + outline and click popup via point lookups on the store (one materialized feature at most)
+  const hoverOutline = L.geoJSON(null, { interactive:false, style: { color:"#f59e0b", weight:2, fillOpacity:0 } }).addTo(map);
+  const hoverTip = L.tooltip({ direction:"top", offset:[0, -8] });
+  let hoverRow = -1, hoverFrame = 0, drawing = false;
+  map.on(L.Draw.Event.DRAWSTART, () => { drawing = true; }).on(L.Draw.Event.DRAWSTOP, () => { drawing = false; });
+  map.on("mousemove", e => {
+    if (hoverFrame) return;
+    hoverFrame = requestAnimationFrame(() => {
+      hoverFrame = 0;
+      const i = drawing ? -1 : zipAt(e.latlng.lng, e.latlng.lat);
+      if (i !== hoverRow) { hoverRow = i; hoverOutline.clearLayers(); if (i >= 0) hoverOutline.addData(storeFeature(i)); }
+      if (i >= 0) { hoverTip.setLatLng(e.latlng).setContent(`<b>${store.zip[i]}</b> — ${store.city[i]}, ${store.state[i]}`); if (!map.hasLayer(hoverTip)) map.openTooltip(hoverTip); }
+      else if (map.hasLayer(hoverTip)) map.closeTooltip(hoverTip);
+    });
+  });
+  map.on("mouseout", () => { hoverRow = -1; hoverOutline.clearLayers(); if (map.hasLayer(hoverTip)) map.closeTooltip(hoverTip); });
+  map.on("click", e => { if (drawing) return; const i = zipAt(e.latlng.lng, e.latlng.lat); if (i >= 0) showZipOwners(i, e.latlng); });
 
   const perZipEdges   = L.geoJSON(null, { style: { color:"#ff6d00", weight:3, fillOpacity:0 }}).addTo(map);
   const selectionFill = L.geoJSON(null, { style: { color:"#7dd3fc", weight:0, fillColor:"#7dd3fc", fillOpacity:0.05 }}).addTo(map);
@@ -312,8 +639,10 @@ html_template = r"""<!doctype html>
   let labelsEnabled = false;
 
   const drawControl = new L.Control.Draw({
-    draw: { polygon:false, polyline:false, circle:false, marker:false, circlemarker:false,
-      rectangle: { shapeOptions: { color:"#7dd3fc", weight:2 } } },
+    draw: { polyline:false, marker:false, circlemarker:false,
+      rectangle: { shapeOptions: { color:"#7dd3fc", weight:2 } },
+      polygon: { allowIntersection: false, showArea: false, shapeOptions: { color:"#7dd3fc", weight:2 } },
+      circle: { metric: false, feet: false, shapeOptions: { color:"#7dd3fc", weight:2 } } },
     edit: false
   });
   map.addControl(drawControl);
@@ -331,39 +660,78 @@ html_template = r"""<!doctype html>
     return f;
   }
 
-  let zipIndex = new Map();
-  let allFeatures = [];
   let labelsBuilt = false;
 
-  async function loadData() {
+  // With the API, /zips is asked for the zoom it will be drawn at: the whole dataset once, simplified for the
+  // starting view, then the (padded, grid-snapped) viewport on each moveend once the map is zoomed in
+  // further. Sharper copies replace coarser ones by ZIP in place, so store rows keep their index.
+  const VIEW_SNAP_DEG = 0.05, MAX_API_ZOOM = 14;
+  const apiZips = new Map();   // ZIP -> { f, zoom }
+  let apiBaseZoom = 0;         // zoom the whole-dataset fetch was simplified for
+  function apiZoom(){ return Math.min(Math.floor(map.getZoom()), MAX_API_ZOOM); }
+  function viewBBox(){
+    const b = map.getBounds().pad(0.25), q = VIEW_SNAP_DEG;
+    return [Math.floor(b.getWest() / q) * q, Math.floor(b.getSouth() / q) * q, Math.ceil(b.getEast() / q) * q, Math.ceil(b.getNorth() / q) * q]
+      .map(v => Math.max(-180, Math.min(180, v)).toFixed(2));
+  }
+  async function fetchApiZips(zoom, bbox, signal){
+    const fc = await apiGet(`/zips?zoom=${zoom}` + (bbox ? `&bbox=${bbox.join(",")}` : ""), signal);
+    let changed = 0;
+    (fc.features || []).forEach(f => {
+      f = normalizeFeature(f);
+      const had = apiZips.get(f.properties.zip);
+      if (!had || had.zoom < zoom) { apiZips.set(f.properties.zip, { f, zoom }); changed++; }
+    });
+    return changed;
+  }
+  function rebuildStoreFromApi(){ store = buildStore(Array.from(apiZips.values(), z => z.f)); zipLayer.redraw(); }
+
+  async function refetchViewport(){
+    const zoom = apiZoom();
+    if (zoom <= apiBaseZoom) { cancelGroup("viewport"); return; }   // base copy is already sharp enough
+    const tok = newToken("viewport");
+    try { if (await fetchApiZips(zoom, viewBBox(), tok.signal)) rebuildStoreFromApi(); }
+    catch (e) { if (!tok.cancelled) console.warn("viewport /zips failed", e); }
+  }
+
+  async function fetchFeatures() {
     const [il, _in] = await Promise.all([fetch(IL_URL).then(r=>r.json()), fetch(IN_URL).then(r=>r.json())]);
-    const features = [...(il.features||[]), ...(_in.features||[])].map(normalizeFeature);
-    allFeatures = features;
+    return [...(il.features||[]), ...(_in.features||[])];
+  }
 
-    zipLayer.addData({ type:"FeatureCollection", features });
-    zipLayer.eachLayer(l => { const z = (l.feature.properties.zip||"").toString(); if (z) zipIndex.set(z, l); });
+  async function loadData() {
+    if (API_BASE) {
+      apiBaseZoom = apiZoom();
+      await fetchApiZips(apiBaseZoom, null);
+      rebuildStoreFromApi();
+    } else {
+      store = buildStore((await fetchFeatures()).map(normalizeFeature));   // GeoJSON is dropped after this
+      zipLayer.redraw();
+    }
 
     const b = zipLayer.getBounds();
     if (b.isValid()) map.fitBounds(b, { padding:[20,20] });
 
     TECHS = loadTechs();
+    await syncRoster();
     renderTechList();
     if (allTerritoriesOn) buildAllTerritories();
+    if (API_BASE) { map.on("moveend", refetchViewport); refetchViewport(); }
   }
-  loadData().catch(err => console.error("Data load failed", err));
+  perfSpan("loadData", loadData).catch(err => console.error("Data load failed", err));
 
   // ------------------- Labels on Zoom -------------------
   function buildLabels() {
     if (labelsBuilt) return;
     labelsBuilt = true;
-    zipLayer.eachLayer(l => {
-      const f = l.feature; if (!f) return;
-      const center = turf.centerOfMass(f).geometry.coordinates;
-      const zip = f.properties.zip;
+    for (let i = 0; i < store.n; i++) {
+      const rp = repPoint(store.zip[i]); if (!rp) continue;
+      const center = rp.c;
+      const zip = store.zip[i];
       const icon = L.divIcon({ className:"zip-label", html:`<div style="font-size:10px;color:#0b132b;text-shadow:0 0 2px #fff">${zip}</div>` });
       const m = L.marker([center[1], center[0]], { icon });
       labelsLayer.addLayer(m);
-    });
+    }
   }
   const LABEL_ZOOM = 12;
   function syncLabels() {
@@ -383,31 +751,212 @@ html_template = r"""<!doctype html>
   function dimBaseZips(){ zipLayer.setStyle({ color:"#3b4766", weight:0.4, fillOpacity:0.06 }); }
   function restoreBaseZips(){ zipLayer.setStyle({ color:"#2b344d", weight:0.6, fillOpacity:0.10 }); }
 
-  async function unionMany(features, batch=40){
+  // ------------------- Job scheduler (priority, cancellation, superseding) -------------------
+  // Geometry work runs as jobs, one at a time, highest rank first (ties in submit order). Each job gets a
+  // token: loops call `await tok.yield()` between batches, which throws Cancelled once the token is
+  // cancelled, and fetches pass tok.signal. Taking a new token for a group cancels the group's previous
+  // one, so a new selection supersedes the last and a roster edit restarts the territory build. Ranks are
+  // read at dispatch time, so queued territory jobs follow the viewport while the user pans.
+  const PRIO = { interactive: 10, territory: 1 };
+  class Cancelled extends Error {}
+  const jobQueue = [], jobGroups = new Map();
+  let jobRunning = null;
+
+  function newToken(group){
+    if (group) cancelGroup(group);
+    const ac = new AbortController();
+    const tok = { cancelled: false, signal: ac.signal,
+      cancel(){ if (!this.cancelled) { this.cancelled = true; ac.abort(); showJobBusy(); } },
+      check(){ if (this.cancelled) throw new Cancelled(); },
+      async yield(){ await new Promise(r => setTimeout(r)); this.check(); },
+      progress(msg){ if (jobRunning && jobRunning.tok === this) { jobRunning.msg = msg; showJobBusy(); } } };
+    if (group) jobGroups.set(group, tok);
+    return tok;
+  }
+  function cancelGroup(group){ const t = jobGroups.get(group); if (t) { t.cancel(); jobGroups.delete(group); } }
+
+  // -> promise of fn(tok)'s result, or null if the job was cancelled before or while running
+  function schedule(label, fn, { priority = 0, rank = null, tok = newToken() } = {}){
+    return new Promise((resolve, reject) => {
+      jobQueue.push({ msg: label, fn, rank: rank || (() => priority), tok, resolve, reject });
+      queueMicrotask(pumpJobs);   // jobs submitted together are ranked together
+    });
+  }
+  async function pumpJobs(){
+    if (jobRunning) return;
+    for (let k = jobQueue.length - 1; k >= 0; k--) if (jobQueue[k].tok.cancelled) jobQueue.splice(k, 1)[0].resolve(null);
+    if (!jobQueue.length) { hideBusy(); return; }
+    let best = 0, bestRank = -Infinity;
+    jobQueue.forEach((j, k) => { const r = j.rank(); if (r > bestRank) { best = k; bestRank = r; } });
+    const job = jobRunning = jobQueue.splice(best, 1)[0];
+    showJobBusy();
+    try { job.resolve(await job.fn(job.tok)); }
+    catch (e) { if (e instanceof Cancelled || job.tok.cancelled) job.resolve(null); else job.reject(e); }
+    finally { jobRunning = null; pumpJobs(); }
+  }
+  function showJobBusy(){
+    if (!jobRunning) return;
+    const waiting = jobQueue.filter(j => !j.tok.cancelled).length;
+    showBusy(jobRunning.tok.cancelled ? "Cancelling…" : waiting ? `${jobRunning.msg} (${waiting} queued)` : jobRunning.msg);
+  }
+  // cancelling the territory build turns the overlay off rather than leaving it half drawn
+  document.getElementById("busyCancel").addEventListener("click", () => {
+    if (!jobRunning) return;
+    if (jobRunning.tok === jobGroups.get("territories")) hideAllTerritories();
+    else jobRunning.tok.cancel();
+  });
+
+  async function unionMany(features, batch, tok){
     if(!features.length) return null;
-    let acc = features[0];
-    for (let i=1;i<features.length;i++){
-      try { acc = turf.union(acc, features[i]); } catch(e){ console.warn('union error', e); }
-      if (i % batch === 0) await new Promise(r=>setTimeout(r));
-    }
-    return acc;
+    return perfSpan("unionMany", async () => {
+      let acc = features[0];
+      for (let i=1;i<features.length;i++){
+        try { acc = turf.union(acc, features[i]); } catch(e){ console.warn('union error', e); }
+        if (i % batch === 0) await tok.yield();
+      }
+      return acc;
+    }, { label: `${features.length} features` });
   }
 
-  async function computeTechUnion(tech){
+  async function computeTechUnion(tech, tok){
     const key = `${tech.id}:${tech.zips.join('|')}`;
     if (unionCache.has(key)) return unionCache.get(key);
-    const feats = [];
-    tech.zips.forEach(z => { const layer = zipIndex.get(z); if (layer) feats.push(layer.feature); });
+    const feats = tech.zips.map(zipFeature).filter(Boolean);
     if (!feats.length) return null;
-    showBusy(`Building ${tech.name}…`);
-    let u = await unionMany(feats, 30);
-    try { const tol = Math.min(0.002, 0.0006 + feats.length * 0.000004); u = turf.simplify(u, { tolerance: tol, highQuality: true }); } catch(e) {}
+    const t0 = performance.now();
+    const u = await perfSpan("computeTechUnion", async () => {
+      if (API_BASE) {
+        // union + simplify run server-side (cached there by ZIP-set hash)
+        try { return apiFeature((await apiPost("/territory", { zips: tech.zips }, tok.signal)).union); }
+        catch(e) { tok.check(); console.warn("territory API failed", e); return null; }
+      }
+      let acc = await unionMany(feats, 30, tok);
+      try { const tol = Math.min(0.002, 0.0006 + feats.length * 0.000004); acc = turf.simplify(acc, { tolerance: tol, highQuality: true }); } catch(e) {}
+      return acc;
+    }, { label: tech.name, zips: feats.length });
+    const cost = techCost.get(tech.id) || { name: tech.name, zips: feats.length, ms: 0, runs: 0 };
+    Object.assign(cost, { name: tech.name, zips: feats.length, ms: performance.now() - t0, runs: cost.runs + 1 });
+    techCost.set(tech.id, cost);
+    if (!u) return null;
     unionCache.set(key, u);
-    hideBusy();
     return u;
   }
 
-  // ------------------- Rectangle Selection -------------------
+  // ------------------- Nearest technician (uncovered ZIPs) -------------------
+  // Each tech contributes a representative point per covered ZIP plus an area-weighted territory centroid.
+  // Points live in a static 3-D KD-tree on the unit sphere, where chord order == great-circle order.
+  const EARTH_MI = 3958.8;
+  const repPointCache = new Map();
+  let nearestTree = null, nearestKey = "";
+
+  function unitXYZ(lon, lat){ const a = lon*Math.PI/180, b = lat*Math.PI/180, c = Math.cos(b); return [c*Math.cos(a), c*Math.sin(a), Math.sin(b)]; }
+  function repPoint(zip){
+    if (repPointCache.has(zip)) return repPointCache.get(zip);
+    const i = store.rowOf.get(zip), rp = i === undefined ? null : storeRepPoint(i);
+    repPointCache.set(zip, rp);
+    return rp;
+  }
+
+  function buildNearestTree(){
+    const xyz = [], owner = [];
+    TECHS.forEach((t, ti) => {
+      let sx = 0, sy = 0, sw = 0;
+      t.zips.forEach(z => { const rp = repPoint(z); if (!rp) return; xyz.push(...unitXYZ(rp.c[0], rp.c[1])); owner.push(ti); sx += rp.c[0]*rp.w; sy += rp.c[1]*rp.w; sw += rp.w; });
+      if (sw > 0) { xyz.push(...unitXYZ(sx/sw, sy/sw)); owner.push(ti); }
+    });
+    return { ...kdBuild(Float64Array.from(xyz)), owner };
+  }
+
+  // static 3-D KD-tree over packed xyz points (implicit median layout in `order`)
+  function kdBuild(P){
+    const order = Array.from({ length: P.length / 3 }, (_, i) => i);
+    (function build(lo, hi, depth){
+      if (hi - lo <= 1) return;
+      const ax = depth % 3, sub = order.slice(lo, hi).sort((a, b) => P[3*a+ax] - P[3*b+ax]);
+      for (let k=0; k<sub.length; k++) order[lo+k] = sub[k];
+      const mid = (lo + hi) >> 1; build(lo, mid, depth+1); build(mid+1, hi, depth+1);
+    })(0, order.length, 0);
+    return { P, order };
+  }
+
+  // all points within chord distance r of q
+  function kdWithin(tree, q, r){
+    const { P, order } = tree, out = [], r2 = r*r;
+    (function visit(lo, hi, depth){
+      if (lo >= hi) return;
+      const mid = (lo + hi) >> 1, i = order[mid], ax = depth % 3;
+      const dx = q[0]-P[3*i], dy = q[1]-P[3*i+1], dz = q[2]-P[3*i+2];
+      if (dx*dx + dy*dy + dz*dz <= r2) out.push(i);
+      const diff = q[ax] - P[3*i+ax];
+      if (diff <= r) visit(lo, mid, depth+1);
+      if (diff >= -r) visit(mid+1, hi, depth+1);
+    })(0, order.length, 0);
+    return out;
+  }
+
+  function kdNearest(tree, q, kk){
+    const { P, order } = tree, best = [];   // [d2, point] ascending
+    (function visit(lo, hi, depth){
+      if (lo >= hi) return;
+      const mid = (lo + hi) >> 1, i = order[mid], ax = depth % 3;
+      const dx = q[0]-P[3*i], dy = q[1]-P[3*i+1], dz = q[2]-P[3*i+2], d2 = dx*dx + dy*dy + dz*dz;
+      if (best.length < kk || d2 < best[best.length-1][0]) {
+        let j = best.length; best.push([d2, i]);
+        while (j > 0 && best[j-1][0] > d2) { best[j] = best[j-1]; j--; }
+        best[j] = [d2, i]; if (best.length > kk) best.pop();
+      }
+      const diff = q[ax] - P[3*i+ax];
+      if (diff < 0) { visit(lo, mid, depth+1); if (best.length < kk || diff*diff < best[best.length-1][0]) visit(mid+1, hi, depth+1); }
+      else { visit(mid+1, hi, depth+1); if (best.length < kk || diff*diff < best[best.length-1][0]) visit(lo, mid, depth+1); }
+    })(0, order.length, 0);
+    return best;
+  }
+
+  // k nearest technicians by great-circle distance -> [{ tech, miles }]. Same search as nearest_tech.py:
+  // oversample, widen x4 while fewer than k distinct techs turn up, and past NEAREST_MAX_KK (one tech
+  // owning a dense cluster) fall back to an exact per-technician minimum.
+  const NEAREST_OVERSAMPLE = 8, NEAREST_MAX_KK = 256;
+  function nearestTechs(lon, lat, k=3){
+    const key = TECHS.map(t => t.id + ":" + t.zips.join("|")).join(";");
+    if (!nearestTree || key !== nearestKey) { nearestTree = buildNearestTree(); nearestKey = key; }
+    const { P, owner } = nearestTree, n = owner.length, q = unitXYZ(lon, lat);
+    const want = Math.min(k, new Set(owner).size), miles = d2 => 2 * EARTH_MI * Math.asin(Math.min(1, Math.sqrt(d2) / 2));
+    let kk = Math.min(n, Math.max(k, Math.min(k * NEAREST_OVERSAMPLE, NEAREST_MAX_KK)));
+    for (;;) {
+      const out = [], seen = new Set();
+      for (const [d2, i] of kdNearest(nearestTree, q, kk)) {
+        const ti = owner[i]; if (seen.has(ti)) continue;
+        seen.add(ti); out.push({ tech: TECHS[ti], miles: miles(d2) });
+        if (out.length === k) break;
+      }
+      if (out.length >= want || kk >= n) return out;
+      if (kk >= NEAREST_MAX_KK) break;
+      kk = Math.min(n, NEAREST_MAX_KK, kk * 4);
+    }
+    const best = new Map();
+    for (let i = 0; i < n; i++) {
+      const d2 = (q[0]-P[3*i])**2 + (q[1]-P[3*i+1])**2 + (q[2]-P[3*i+2])**2;
+      if (!(best.get(owner[i]) <= d2)) best.set(owner[i], d2);
+    }
+    return [...best].sort((a, b) => a[1] - b[1] || a[0] - b[0]).slice(0, k).map(([ti, d2]) => ({ tech: TECHS[ti], miles: miles(d2) }));
+  }
+
+  function showZipOwners(i, latlng){
+    const zip = store.zip[i];
+    const owners = TECHS.filter(t => t.zips.includes(zip));
+    const box = document.createElement("div");
+    const head = document.createElement("b"); head.textContent = `${zip} — ${store.city[i]}`; box.appendChild(head);
+    const line = document.createElement("div");
+    if (owners.length) line.textContent = "Covered by " + owners.map(t => t.name).join(", ");
+    else {
+      const rp = repPoint(zip), near = rp ? nearestTechs(rp.c[0], rp.c[1], 3) : [];
+      line.textContent = near.length ? "Uncovered. Nearest: " + near.map(n => `${n.tech.name} (${n.miles.toFixed(1)} mi)`).join(", ") : "Uncovered.";
+    }
+    box.appendChild(line);
+    L.popup().setLatLng(latlng).setContent(box).openOn(map);
+  }
+
+  // ------------------- Area Selection (rectangle / lasso / radius) -------------------
   const selectionPanel = document.getElementById("selectionPanel");
   const zipListEl = document.getElementById("zipList");
   const clearSelectionBtn = document.getElementById("clearSelection");
@@ -416,6 +965,7 @@ html_template = r"""<!doctype html>
   let lastSelectionZips = [];
 
   function clearSelectionLayers() {
+    cancelGroup("selection");
     perZipEdges.clearLayers();
     selectionFill.clearLayers();
     selectionHalo.clearLayers();
@@ -437,27 +987,120 @@ html_template = r"""<!doctype html>
   }
   copyZipsBtn.addEventListener("click", copySelectionZips);
 
-  map.on(L.Draw.Event.CREATED, async e => {
-    if (e.layerType !== "rectangle") return;
+  map.on(L.Draw.Event.CREATED, e => {
+    if (!["rectangle", "polygon", "circle"].includes(e.layerType)) return;
+    selectArea(e);
+  });
+
+  // Local selection index, built on first use: rectangle/lasso candidates come from the store's bbox grid;
+  // radius queries use a KD-tree of ZIP representative points plus each ZIP's reach (chord to its
+  // farthest vertex). Candidates are refined exactly against a prepared query polygon.
+  let selIndex = null;
+
+  function buildSelectionIndex(){
+    const xyz = new Float64Array(3 * store.n), reach = new Float64Array(store.n), C = store.coords, B = store.bbox;
+    for (let i = 0; i < store.n; i++) {
+      const rp = repPoint(store.zip[i]), c = rp ? rp.c : [(B[4*i] + B[4*i+2]) / 2, (B[4*i+1] + B[4*i+3]) / 2], q = unitXYZ(c[0], c[1]);
+      xyz.set(q, 3*i);
+      let far = 0;
+      forEachRing(i, (a, b) => { for (let v = a; v < b; v++) { const p = unitXYZ(C[2*v], C[2*v+1]); far = Math.max(far, Math.hypot(p[0]-q[0], p[1]-q[1], p[2]-q[2])); } });
+      reach[i] = far;
+    }
+    return { reach, maxReach: reach.reduce((a, b) => Math.max(a, b), 0), tree: kdBuild(xyz) };
+  }
+
+  // Prepared query polygon: edges bucketed into horizontal bands, so point-in-polygon and edge-crossing
+  // tests only look at the few edges near a given y instead of the whole ring.
+  const PREP_BANDS = 64;
+  function preparePolygon(geom){
+    const polys = geom.type === "MultiPolygon" ? geom.coordinates : [geom.coordinates], edges = [];
+    polys.forEach(rings => rings.forEach(r => { for (let i = 1; i < r.length; i++) edges.push(r[i-1][0], r[i-1][1], r[i][0], r[i][1]); }));
+    const E = Float64Array.from(edges), [w, s, e, n] = turf.bbox(geom), h = (n - s) / PREP_BANDS || 1;
+    const bands = Array.from({ length: PREP_BANDS }, () => []);
+    const band = y => Math.min(PREP_BANDS - 1, Math.max(0, Math.floor((y - s) / h)));
+    for (let k = 0; k < E.length / 4; k++) for (let b = band(Math.min(E[4*k+1], E[4*k+3])); b <= band(Math.max(E[4*k+1], E[4*k+3])); b++) bands[b].push(k);
+    return { geom, E, bbox: [w, s, e, n], bands, band, first: polys[0][0][0] };
+  }
+
+  function prepContains(prep, x, y){
+    const [w, s, e, n] = prep.bbox; if (x < w || x > e || y < s || y > n) return false;
+    let inside = false; const E = prep.E;
+    for (const k of prep.bands[prep.band(y)]) {
+      const x1 = E[4*k], y1 = E[4*k+1], x2 = E[4*k+2], y2 = E[4*k+3];
+      if ((y1 > y) !== (y2 > y) && x < (x2 - x1) * (y - y1) / (y2 - y1) + x1) inside = !inside;
+    }
+    return inside;
+  }
+
+  function segmentsCross(ax, ay, bx, by, cx, cy, dx, dy){
+    const d1 = (dx-cx)*(ay-cy) - (dy-cy)*(ax-cx), d2 = (dx-cx)*(by-cy) - (dy-cy)*(bx-cx);
+    const d3 = (bx-ax)*(cy-ay) - (by-ay)*(cx-ax), d4 = (bx-ax)*(dy-ay) - (by-ay)*(dx-ax);
+    return d1*d2 <= 0 && d3*d4 <= 0 && Math.max(ax,bx) >= Math.min(cx,dx) && Math.max(cx,dx) >= Math.min(ax,bx)
+      && Math.max(ay,by) >= Math.min(cy,dy) && Math.max(cy,dy) >= Math.min(ay,by);
+  }
+
+  function prepCrosses(prep, ax, ay, bx, by){
+    const E = prep.E, [w, s, e, n] = prep.bbox;
+    if (Math.max(ax,bx) < w || Math.min(ax,bx) > e || Math.max(ay,by) < s || Math.min(ay,by) > n) return false;
+    for (let b = prep.band(Math.min(ay,by)); b <= prep.band(Math.max(ay,by)); b++)
+      for (const k of prep.bands[b]) if (segmentsCross(ax, ay, bx, by, E[4*k], E[4*k+1], E[4*k+2], E[4*k+3])) return true;
+    return false;
+  }
+
+  // exact polygon/polygon intersects against store row i: a ZIP part inside the query, crossing
+  // boundaries, or the query inside the ZIP
+  function prepIntersects(prep, i){
+    const C = store.coords; let hit = false;
+    forEachRing(i, (a, b, outer) => { if (!hit && outer && prepContains(prep, C[2*a], C[2*a+1])) hit = true; });
+    if (hit) return true;
+    forEachRing(i, (a, b) => { for (let v = a + 1; v < b && !hit; v++) hit = prepCrosses(prep, C[2*v-2], C[2*v-1], C[2*v], C[2*v+1]); });
+    return hit || storeContains(i, prep.first[0], prep.first[1]);
+  }
+
+  function localSelect(e){
+    if (!selIndex) selIndex = buildSelectionIndex();
+    let prep, cand;
+    if (e.layerType === "circle") {
+      const c = e.layer.getLatLng(), miles = e.layer.getRadius() / 1609.344, q = unitXYZ(c.lng, c.lat);
+      const r = 2 * Math.sin(Math.min(miles / (2 * EARTH_MI), Math.PI / 2));
+      cand = kdWithin(selIndex.tree, q, r + selIndex.maxReach).filter(i => {
+        const P = selIndex.tree.P; return Math.hypot(P[3*i]-q[0], P[3*i+1]-q[1], P[3*i+2]-q[2]) <= r + selIndex.reach[i];
+      });
+      prep = preparePolygon(turf.circle([c.lng, c.lat], miles, { units: "miles", steps: 128 }).geometry);
+    } else {
+      prep = preparePolygon(e.layer.toGeoJSON().geometry);
+      cand = storeCandidates(prep.bbox);
+    }
+    return cand.filter(i => prepIntersects(prep, i)).map(storeFeature);
+  }
+
+  async function apiSelect(e, signal){
+    if (e.layerType === "circle") {
+      const c = e.layer.getLatLng(), miles = e.layer.getRadius() / 1609.344;
+      return apiGet(`/select?lon=${c.lng}&lat=${c.lat}&miles=${miles}`, signal);
+    }
+    if (e.layerType === "polygon") return apiPost("/select", { polygon: e.layer.toGeoJSON().geometry }, signal);
     const b = e.layer.getBounds();
-    const rectPoly = turf.polygon([[
-      [b.getWest(), b.getSouth()],
-      [b.getEast(), b.getSouth()],
-      [b.getEast(), b.getNorth()],
-      [b.getWest(), b.getNorth()],
-      [b.getWest(), b.getSouth()]
-    ]]);
-
-    const hits = [];
-    showBusy('Selecting…');
-    zipLayer.eachLayer(l => {
-      const f = l.feature;
-      const bb = l.getBounds ? l.getBounds() : null;
-      if (bb) {
-        if (bb.getEast() < b.getWest() || bb.getWest() > b.getEast() || bb.getNorth() < b.getSouth() || bb.getSouth() > b.getNorth()) return;
-      }
-      try { if (turf.booleanIntersects(f, rectPoly)) hits.push(f); } catch {}
-    });
+    return apiGet(`/select?bbox=${[b.getWest(), b.getSouth(), b.getEast(), b.getNorth()].join(",")}`, signal);
+  }
+
+  // a newer selection (or tech highlight) supersedes this one, even mid-union
+  function selectArea(e){
+    return schedule("Selecting…", tok => perfSpan(`${e.layerType}Selection`, () => selectAreaNow(e, tok), { label: e.layerType }),
+                    { priority: PRIO.interactive, tok: newToken("selection") });
+  }
+  async function selectAreaNow(e, tok) {
+    let hits = [];
+    let apiUnion = null;
+    if (API_BASE) {
+      try {
+        const res = await apiSelect(e, tok.signal);
+        hits = res.zips.map(zipFeature).filter(Boolean);
+        apiUnion = apiFeature(res.union);
+      } catch(err) { tok.check(); console.warn("select API failed", err); }
+    } else {
+      hits = localSelect(e);
+    }
 
     zipListEl.innerHTML = "";
     const zips = Array.from(new Set(hits.map(h => h.properties.zip))).sort();
@@ -481,9 +1124,12 @@ html_template = r"""<!doctype html>
     }
 
     if (hits.length) {
-      showBusy(`Computing union (${hits.length} ZIPs)…`);
-      let u = await unionMany(hits, 40);
-      try { const tol = Math.min(0.002, 0.0006 + hits.length * 0.000004); u = turf.simplify(u, { tolerance: tol, highQuality: true }); } catch {}
+      tok.progress(`Computing union (${hits.length} ZIPs)…`);
+      let u = apiUnion;
+      if (!u) {
+        u = await unionMany(hits, 40, tok);
+        try { const tol = Math.min(0.002, 0.0006 + hits.length * 0.000004); u = turf.simplify(u, { tolerance: tol, highQuality: true }); } catch {}
+      }
       selectionFill.setStyle({ color:'#7dd3fc', fillColor:'#7dd3fc', weight:0, fillOpacity:0.05 });
       selectionFill.addData(u);
       try { const line = turf.polygonToLine(u); selectionHalo.addData(line); unionOutline.setStyle({ color: '#7dd3fc', weight:3, opacity:1 }); unionOutline.addData(line); }
@@ -491,8 +1137,7 @@ html_template = r"""<!doctype html>
       try { const c = turf.centerOfMass(u).geometry.coordinates; const icon = L.divIcon({ className:'tech-center-label', iconSize: null, html:`<div class='tech-pill' style='color:#7dd3fc'>Selection (${zips.length})</div>` }); selectionLabel = L.marker([c[1], c[0]], { icon }).addTo(map); } catch {}
       const ub = unionOutline.getBounds(); if (ub.isValid()) map.fitBounds(ub, { padding:[20,20] });
     }
-    hideBusy();
-  });
+  }
 
   // ------------------- Technician CRUD + Interactions -------------------
   const techListEl = document.getElementById("techList");
@@ -522,20 +1167,47 @@ html_template = r"""<!doctype html>
     if (!name) { addMsg.textContent = "Name is required."; addMsg.className = "msg err"; return; }
     if (!zips.length) { addMsg.textContent = "Enter at least one valid 5-digit ZIP."; addMsg.className = "msg err"; return; }
     const id = Date.now();
-    TECHS.push({ id, name, contact, zips });
+    const tech = { id, name, contact, zips };
+    TECHS.push(tech);
     saveTechs();
+    pushTech(tech);
     addMsg.textContent = "Technician added."; addMsg.className = "msg ok";
     addName.value = ""; addContact.value = ""; addZips.value = "";
     renderTechList(techSearch.value);
     if (allTerritoriesOn) buildAllTerritories();
   }
   addBtn.addEventListener("click", addTech);
+
+  // Roster files from roster_import.py (same shape as DEFAULT_TECHS) replace the current roster
+  const importInput = document.getElementById("importRoster");
+  document.getElementById("importRosterBtn").addEventListener("click", () => importInput.click());
+  importInput.addEventListener("change", async () => {
+    const file = importInput.files[0]; importInput.value = "";
+    if (!file) return;
+    try {
+      const arr = JSON.parse(await file.text());
+      if (!Array.isArray(arr)) throw new Error("not a roster list");
+      const base = Date.now();
+      const techs = arr.filter(t => t && t.name && Array.isArray(t.zips))
+        .map((t, i) => ({ id: t.id ?? base + i, name: String(t.name), contact: t.contact || "", zips: parseZips(t.zips.join(",")) }));
+      const keep = new Set(techs.map(t => t.id));
+      const removed = TECHS.filter(t => !keep.has(t.id)).map(t => ({ id: t.id, del: true }));
+      TECHS = techs;
+      saveTechs();
+      addMsg.textContent = `Imported ${techs.length} technician${techs.length === 1 ? "" : "s"}.`; addMsg.className = "msg ok";
+      renderTechList(techSearch.value);
+      if (allTerritoriesOn) buildAllTerritories();
+      if (ROSTER_API) await pushOps([{ techs }, ...removed]);
+    } catch(e) { addMsg.textContent = `Import failed: ${e.message}`; addMsg.className = "msg err"; }
+  });
   resetBtn.addEventListener("click", resetTechs);
   document.getElementById("clearAll").addEventListener("click", () => { clearSelectionLayers(); clearTechHighlight(); });
 
-  async function highlightTechArea(tech) {
-    const feats = [];
-    tech.zips.forEach(z => { const layer = zipIndex.get(z); if (layer) feats.push(layer.feature); });
+  function highlightTechArea(tech){
+    return schedule(`Building ${tech.name}…`, tok => highlightTechAreaNow(tech, tok), { priority: PRIO.interactive, tok: newToken("selection") });
+  }
+  async function highlightTechAreaNow(tech, tok) {
+    const feats = tech.zips.map(zipFeature).filter(Boolean);
 
     // Draw per-zip edges (skip for huge)
     perZipEdges.clearLayers();
@@ -549,9 +1221,7 @@ html_template = r"""<!doctype html>
     // Compute union (cached + simplified) and draw fill+halo+outline+label
     selectionFill.clearLayers(); selectionHalo.clearLayers(); unionOutline.clearLayers();
     if (selectionLabel) { map.removeLayer(selectionLabel); selectionLabel = null; }
-    showBusy(`Building ${tech.name}…`);
-    const u = await computeTechUnion(tech);
-    hideBusy();
+    const u = await computeTechUnion(tech, tok);
     if (!u) return;
     const idx = TECHS.findIndex(x => x.id === tech.id);
     const color = COLORS[(idx >= 0 ? idx : 0) % COLORS.length];
@@ -569,6 +1239,7 @@ html_template = r"""<!doctype html>
   }
 
   function clearTechHighlight() {
+    cancelGroup("selection");
     perZipEdges.clearLayers();
     selectionFill.clearLayers();
     selectionHalo.clearLayers();
@@ -596,13 +1267,14 @@ html_template = r"""<!doctype html>
       card.appendChild(header);
 
       if (t.contact) { const contact = document.createElement("div"); contact.className = "tiny"; contact.textContent = t.contact; card.appendChild(contact); }
+      const stats = document.createElement("div"); stats.className = "tiny tech-metrics"; card.appendChild(stats); fillMetrics(stats, t);
 
       // Collapsible ZIP section
       const zipSection = document.createElement("div"); zipSection.className = "zip-section collapsed";
       const zipToggle = document.createElement("button"); zipToggle.className = "zip-toggle"; zipToggle.setAttribute("aria-expanded","false");
       zipToggle.innerHTML = `<span class="arrow"></span><span>ZIPs</span> <span class="tiny">(${t.zips.length})</span>`;
       const zipWrap = document.createElement("div"); zipWrap.className = "zip-list";
-      t.zips.forEach(z => { const pill = document.createElement("span"); pill.className = "zip-pill"; pill.textContent = z; if (!zipIndex.has(z)) pill.classList.add("pill-missing"); zipWrap.appendChild(pill); });
+      t.zips.forEach(z => { const pill = document.createElement("span"); pill.className = "zip-pill"; pill.textContent = z; if (!store.rowOf.has(z)) pill.classList.add("pill-missing"); zipWrap.appendChild(pill); });
       zipSection.appendChild(zipToggle); zipSection.appendChild(zipWrap); card.appendChild(zipSection);
       zipToggle.addEventListener("click", () => { const isCollapsed = zipSection.classList.toggle("collapsed"); zipToggle.setAttribute("aria-expanded", String(!isCollapsed)); });
 
@@ -634,6 +1306,7 @@ html_template = r"""<!doctype html>
         if (!newZips.length) { msg.textContent = "Enter at least one valid 5-digit ZIP."; msg.className="msg err"; return; }
         t.name = newName; t.contact = newContact; t.zips = newZips;
         saveTechs();
+        pushTech(t);
         msg.textContent = "Saved."; msg.className="msg ok";
         renderTechList(techSearch.value);
         if (allTerritoriesOn) buildAllTerritories();
@@ -642,6 +1315,7 @@ html_template = r"""<!doctype html>
         if (!confirm(`Delete ${t.name}?`)) return;
         TECHS = TECHS.filter(x => x.id !== t.id);
         saveTechs();
+        pushDelete(t.id);
         renderTechList(techSearch.value);
         if (allTerritoriesOn) buildAllTerritories();
       });
@@ -657,44 +1331,69 @@ html_template = r"""<!doctype html>
   let allTerritoriesOn = false;
   const allTechOverlays = L.layerGroup();
 
-  async function buildAllTerritories(){
-    showBusy("Building territories…");
+  // bbox of a tech's ZIPs from the store, or null
+  function techBBox(t){
+    const B = store.bbox; let w = Infinity, s = Infinity, e = -Infinity, n = -Infinity;
+    t.zips.forEach(z => { const i = store.rowOf.get(z); if (i === undefined) return; w = Math.min(w, B[4*i]); s = Math.min(s, B[4*i+1]); e = Math.max(e, B[4*i+2]); n = Math.max(n, B[4*i+3]); });
+    return w <= e ? [w, s, e, n] : null;
+  }
+  // 0..1: on-screen territories rank above off-screen ones, nearer the view centre first
+  function viewRank(bb){
+    if (!bb) return 0;
+    const v = map.getBounds(), c = map.getCenter();
+    const onScreen = bb[2] >= v.getWest() && bb[0] <= v.getEast() && bb[3] >= v.getSouth() && bb[1] <= v.getNorth();
+    return (onScreen ? 0.5 : 0) + 0.5 / (1 + Math.hypot((bb[0] + bb[2]) / 2 - c.lng, (bb[1] + bb[3]) / 2 - c.lat));
+  }
+
+  // one job per tech sharing the "territories" token: hiding the overlay or rebuilding cancels them all
+  function buildAllTerritories(){
+    const tok = newToken("territories");
+    return perfSpan("buildAllTerritories", () => buildAllTerritoriesNow(tok), { label: `${TECHS.length} techs` });
+  }
+  async function buildAllTerritoriesNow(tok){
     allTechOverlays.clearLayers();
+    if (!map.hasLayer(allTechOverlays)) allTechOverlays.addTo(map);
+    dimBaseZips();
     const legend = document.getElementById("legendBox");
     const old = document.getElementById("territoryLegend"); if (old) old.remove();
     const lg = document.createElement("div"); lg.id = "territoryLegend"; lg.style.marginTop = "6px";
     lg.innerHTML = "<div style='margin-bottom:4px;font-weight:600'>Territories</div>";
+    legend.appendChild(lg);
 
-    for (let idx=0; idx<TECHS.length; idx++){
-      const t = TECHS[idx];
-      const u = await computeTechUnion(t);
-      if (!u) continue;
-      const color = COLORS[idx % COLORS.length];
-
-      try { L.geoJSON(u, { style: { color, weight:0, fillColor: color, fillOpacity: 0.05 } }).addTo(allTechOverlays); } catch(e){}
-      let halo = null;
-      try { const line = turf.polygonToLine(u); halo = L.geoJSON(line, { style: { color:"#ffffff", weight:7, opacity:0.85, lineJoin:"round", lineCap:"round" } }); }
-      catch(e){ halo = L.geoJSON(u, { style: { color:"#ffffff", weight:7, opacity:0.85, lineJoin:"round", lineCap:"round" } }); }
-      halo.addTo(allTechOverlays);
-      let outline = null;
-      try { const line = turf.polygonToLine(u); outline = L.geoJSON(line, { style: { color, weight:3, opacity:1, lineJoin:"round", lineCap:"round" } }); }
-      catch(e){ outline = L.geoJSON(u, { style: { color, weight:3, opacity:1, lineJoin:"round", lineCap:"round" } }); }
-      outline.addTo(allTechOverlays);
-
-      try { const c = turf.centerOfMass(u).geometry.coordinates; const icon = L.divIcon({ className:"tech-center-label", iconSize: null, html:`<div class="tech-pill" style="color:${color}">${t.name}</div>` }); L.marker([c[1], c[0]], { icon }).addTo(allTechOverlays); } catch(e) {}
-
-      const row = document.createElement("div"); row.style.display = "flex"; row.style.alignItems = "center"; row.style.gap = "6px"; row.style.marginTop = "4px";
+    let done = 0;
+    await Promise.all(TECHS.map((t, idx) => {
+      const color = COLORS[idx % COLORS.length], bb = techBBox(t);
+      // legend keeps roster order; rows appear as their territory is drawn
+      const row = document.createElement("div"); row.style.display = "none"; row.style.alignItems = "center"; row.style.gap = "6px"; row.style.marginTop = "4px";
       row.innerHTML = `<span style="display:inline-block;width:12px;height:3px;background:${color};border-radius:2px;"></span><span>${t.name}</span>`;
+      const stats = document.createElement("span"); stats.className = "tiny"; stats.style.marginLeft = "auto"; row.appendChild(stats); fillMetrics(stats, t, true);
       lg.appendChild(row);
-      await new Promise(r=>setTimeout(r));
-    }
-    legend.appendChild(lg);
-    if (!map.hasLayer(allTechOverlays)) allTechOverlays.addTo(map);
-    dimBaseZips();
-    hideBusy();
+      return schedule(`Building ${t.name}…`, async () => {
+        tok.progress(`Building territories ${++done}/${TECHS.length}: ${t.name}…`);
+        const u = await computeTechUnion(t, tok);
+        tok.check();
+        if (u) { drawTerritory(u, t, color); row.style.display = "flex"; }
+      }, { rank: () => PRIO.territory + viewRank(bb), tok });
+    }));
+    if (!tok.cancelled) Array.from(lg.children).forEach(r => { if (r.style.display === "none") r.remove(); });
+  }
+
+  function drawTerritory(u, t, color){
+    try { L.geoJSON(u, { style: { color, weight:0, fillColor: color, fillOpacity: 0.05 } }).addTo(allTechOverlays); } catch(e){}
+    let halo = null;
+    try { const line = turf.polygonToLine(u); halo = L.geoJSON(line, { style: { color:"#ffffff", weight:7, opacity:0.85, lineJoin:"round", lineCap:"round" } }); }
+    catch(e){ halo = L.geoJSON(u, { style: { color:"#ffffff", weight:7, opacity:0.85, lineJoin:"round", lineCap:"round" } }); }
+    halo.addTo(allTechOverlays);
+    let outline = null;
+    try { const line = turf.polygonToLine(u); outline = L.geoJSON(line, { style: { color, weight:3, opacity:1, lineJoin:"round", lineCap:"round" } }); }
+    catch(e){ outline = L.geoJSON(u, { style: { color, weight:3, opacity:1, lineJoin:"round", lineCap:"round" } }); }
+    outline.addTo(allTechOverlays);
+
+    try { const c = turf.centerOfMass(u).geometry.coordinates; const icon = L.divIcon({ className:"tech-center-label", iconSize: null, html:`<div class="tech-pill" style="color:${color}">${t.name}</div>` }); L.marker([c[1], c[0]], { icon }).addTo(allTechOverlays); } catch(e) {}
   }
 
   function clearAllTerritories(){
+    cancelGroup("territories");
     allTechOverlays.clearLayers();
     if (map.hasLayer(allTechOverlays)) map.removeLayer(allTechOverlays);
     const old = document.getElementById("territoryLegend"); if (old) old.remove();
@@ -702,20 +1401,69 @@ html_template = r"""<!doctype html>
   }
 
   const toggleAllBtn = document.getElementById("toggleAllTerritories");
+  function hideAllTerritories(){
+    allTerritoriesOn = false;
+    clearAllTerritories();
+    toggleAllBtn.textContent = "Show All Territories";
+  }
   toggleAllBtn.addEventListener("click", async () => {
-    allTerritoriesOn = !allTerritoriesOn;
-    if (allTerritoriesOn) { await buildAllTerritories(); toggleAllBtn.textContent = "Hide All Territories"; }
-    else { clearAllTerritories(); toggleAllBtn.textContent = "Show All Territories"; }
+    if (allTerritoriesOn) { hideAllTerritories(); return; }
+    allTerritoriesOn = true;
+    toggleAllBtn.textContent = "Hide All Territories";
+    await buildAllTerritories();
   });
   </script>
 </body>
 </html>
 """
 
-def main():
-    default_json = "const DEFAULT_TECHS = " + json.dumps(DEFAULT_TECHS, ensure_ascii=False) + ";"
+def _url(u):
+    return json.dumps(u.rstrip("/") if u else None)
+
+def render_html(techs, api_base=None, roster_api=None, debug=False, metrics=None):
+    default_json = "const DEFAULT_TECHS = " + json.dumps(techs, ensure_ascii=False) + ";"
     html = html_template.replace("/*__DEFAULT_TECHS__*/", default_json)
-    OUT.write_text(html, encoding="utf-8")
+    html = html.replace("/*__API_BASE__*/null", _url(api_base))
+    html = html.replace("/*__ROSTER_API__*/null", _url(roster_api))
+    html = html.replace("/*__PERF_DEBUG__*/false", json.dumps(bool(debug)))
+    html = html.replace("/*__TERRITORY_METRICS__*/{}", json.dumps(metrics or {}))
+    return html
+
+def main():
+    ap = argparse.ArgumentParser(description="Write the service coverage planner page.")
+    ap.add_argument("--api", metavar="URL", help="local geometry API (zip_api_server.py), e.g. http://127.0.0.1:8765")
+    ap.add_argument("--roster", metavar="JSON", help="seed DEFAULT_TECHS from a roster file (roster_import.py output)")
+    ap.add_argument("--roster-db", metavar="PATH", help="seed DEFAULT_TECHS from this roster store instead of the list above")
+    ap.add_argument("--roster-api", metavar="URL", help="roster sync API (roster_store.py serve), e.g. http://127.0.0.1:8766")
+    ap.add_argument("--debug", action="store_true", help="show the in-page performance panel by default")
+    ap.add_argument("--trace", metavar="JSON", help="write per-stage timing/memory as Chrome trace JSON")
+    ap.add_argument("--metrics", action="store_true", help="embed territory area/compactness/overlap metrics (territory_metrics.py)")
+    ap.add_argument("--zips", help="ZIP snapshot for --metrics (default: fetch IL+IN from ArcGIS)")
+    args = ap.parse_args()
+    if args.trace:
+        tracing.enable()
+    techs = DEFAULT_TECHS
+    with tracing.span("load roster"):
+        if args.roster:
+            techs = json.loads(Path(args.roster).read_text(encoding="utf-8"))
+        elif args.roster_db:
+            from roster_store import RosterStore
+            techs = RosterStore(args.roster_db).all_techs() or DEFAULT_TECHS
+    metrics = None
+    if args.metrics:
+        from map import load_zips
+        from territory_metrics import CACHE_JSON, load_cache, save_cache, territory_metrics
+        cache = load_cache(CACHE_JSON)
+        with tracing.span("territory metrics", techs=len(techs)):
+            metrics = territory_metrics(load_zips(args.zips), techs, cache)
+        save_cache(CACHE_JSON, cache)
+    with tracing.span("render html", techs=len(techs)):
+        html = render_html(techs, args.api, args.roster_api, args.debug, metrics)
+    with tracing.span("write html"):
+        OUT.write_text(html, encoding="utf-8")
+    if args.trace:
+        tracing.export(args.trace)
+        print(tracing.summary())
     print(f"Wrote {OUT.resolve()}")
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# ZIP dataset diff + selective territory rebuild after a boundary refresh.
+# Every ZIP gets a geometry hash (coordinates rounded to ~1 cm, rings normalized, so re-serialization
+# noise doesn't count as a change). Comparing hashes between snapshots gives added / removed / reshaped
+# ZIPs; only territories containing one of those ZIPs (or whose ZIP list changed) are rebuilt, the rest
+# are carried over from the territory store written by the previous run.
+#
+# Usage: python dataset_diff.py diff old_snapshot.parquet new_snapshot.parquet [--report zip_changes.csv]
+#        python dataset_diff.py refresh --roster roster.json [--zips new_snapshot.parquet]
+#                               [--store territories_built.json] [--report zip_changes.csv]
+
+import argparse
+import hashlib
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import shapely
+
+import tracing
+from map import load_zips
+from territories import dataset_version, territory_geojson, territory_union, zip_positions, zip_set_key
+
+# ---------------------- SETTINGS ----------------------
+HASH_DECIMALS = 7    # ~1 cm in degrees; smaller coordinate jitter is not a change
+STORE_JSON    = "territories_built.json"
+REPORT_CSV    = "zip_changes.csv"
+# ------------------------------------------------------
+
+def zip_hashes(gdf) -> dict:
+    # ZIP -> 16-hex geometry hash; a ZIP split over several rows hashes all its parts
+    geoms = shapely.transform(gdf.geometry.to_numpy(), lambda c: np.round(c, HASH_DECIMALS))
+    wkb = shapely.to_wkb(shapely.normalize(geoms))
+    parts = {}
+    for z, w in zip(gdf["zip"].astype(str), wkb):
+        parts.setdefault(z, []).append(w)
+    return {z: hashlib.sha1(b"".join(sorted(ws))).hexdigest()[:16] for z, ws in parts.items()}
+
+def diff_hashes(old: dict, new: dict) -> dict:
+    return {
+        "added": sorted(new.keys() - old.keys()),
+        "removed": sorted(old.keys() - new.keys()),
+        "reshaped": sorted(z for z in new.keys() & old.keys() if new[z] != old[z]),
+    }
+
+def stale_territories(roster, store: dict, changed: set) -> list:
+    # techs to rebuild: new techs, edited ZIP lists, or any ZIP that changed in the dataset
+    built = store.get("territories", {})
+    out = []
+    for t in roster:
+        prev = built.get(str(t["id"]))
+        if prev is None or prev["key"] != zip_set_key(t.get("zips", [])) or changed.intersection(map(str, t.get("zips", []))):
+            out.append(t)
+    return out
+
+def change_report(diff: dict, roster) -> pd.DataFrame:
+    owners = {}
+    for t in roster:
+        for z in t.get("zips", []):
+            owners.setdefault(str(z), []).append(t)
+    rows = [{"zip": z, "change": kind, "tech_ids": "|".join(str(t["id"]) for t in owners.get(z, [])),
+             "tech_names": "|".join(t["name"] for t in owners.get(z, []))}
+            for kind in ("added", "removed", "reshaped") for z in diff[kind]]
+    return pd.DataFrame(rows, columns=["zip", "change", "tech_ids", "tech_names"])
+
+def load_store(path: Path) -> dict:
+    if path.exists():
+        return json.loads(path.read_text(encoding="utf-8"))
+    return {"version": None, "zip_hashes": {}, "territories": {}}
+
+def refresh(gdf, roster, store: dict) -> tuple:
+    # -> (new store, diff, rebuilt techs); unchanged territories are reused as-is
+    with tracing.span("zip hashes", features=len(gdf)):
+        hashes = zip_hashes(gdf)
+    diff = diff_hashes(store.get("zip_hashes", {}), hashes)
+    changed = set(diff["added"]) | set(diff["removed"]) | set(diff["reshaped"])
+    stale = stale_territories(roster, store, changed)
+
+    keep = {str(t["id"]) for t in roster}
+    territories = {k: v for k, v in store.get("territories", {}).items() if k in keep}
+    positions = zip_positions(gdf)
+    with tracing.span("rebuild territories", count=len(stale)):
+        for t in stale:
+            u, missing = territory_union(gdf, positions, t.get("zips", []))
+            territories[str(t["id"])] = dict(territory_geojson(u, t.get("zips", []), missing), name=t["name"])
+    new_store = {"version": dataset_version(gdf), "zip_hashes": hashes, "territories": territories}
+    return new_store, diff, stale
+
+def main():
+    ap = argparse.ArgumentParser(description="Diff ZIP snapshots and rebuild only the territories they affect.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    d = sub.add_parser("diff", help="compare two ZIP snapshots")
+    d.add_argument("old")
+    d.add_argument("new")
+    d.add_argument("--roster", type=Path, help="list the technicians owning each changed ZIP")
+    d.add_argument("--report", type=Path, default=Path(REPORT_CSV))
+    r = sub.add_parser("refresh", help="rebuild stale territories against a new snapshot")
+    r.add_argument("--roster", required=True, type=Path)
+    r.add_argument("--zips", help="new ZIP snapshot (default: fetch IL+IN from ArcGIS)")
+    r.add_argument("--store", type=Path, default=Path(STORE_JSON))
+    r.add_argument("--report", type=Path, default=Path(REPORT_CSV))
+    args = ap.parse_args()
+
+    roster = json.loads(args.roster.read_text(encoding="utf-8")) if args.roster else []
+    if args.cmd == "diff":
+        diff = diff_hashes(zip_hashes(load_zips(args.old)), zip_hashes(load_zips(args.new)))
+    else:
+        gdf, old = load_zips(args.zips), load_store(args.store)
+        t0 = time.perf_counter()
+        store, diff, stale = refresh(gdf, roster, old)
+        args.store.write_text(json.dumps(store), encoding="utf-8")
+        print(f"Rebuilt {len(stale)} of {len(roster)} territories in {time.perf_counter() - t0:.1f}s -> {args.store}")
+    change_report(diff, roster).to_csv(args.report, index=False)
+    print(f"{len(diff['added'])} added, {len(diff['removed'])} removed, {len(diff['reshaped'])} reshaped ZIPs -> {args.report}")
+
+if __name__ == "__main__":
+    main()
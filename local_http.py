@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# Tiny asyncio HTTP/1.1 server for the planner's local APIs.
+# Stdlib only; binds to localhost, gzip responses, ETag / If-None-Match, CORS for file:// pages.
+
+import asyncio
+import gzip
+import hashlib
+import json
+from urllib.parse import parse_qsl, urlsplit
+
+# ---------------------- SETTINGS ----------------------
+HOST           = "127.0.0.1"   # loopback only; never exposed on the LAN
+GZIP_MIN_BYTES = 1024          # smaller bodies go out uncompressed
+MAX_BODY       = 32 * 1024 * 1024
+# ------------------------------------------------------
+
+REASONS = {200: "OK", 204: "No Content", 304: "Not Modified", 400: "Bad Request",
+           404: "Not Found", 405: "Method Not Allowed", 409: "Conflict",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str = ""):
+        super().__init__(message or REASONS.get(status, ""))
+        self.status = status
+
+class Request:
+    def __init__(self, method, target, headers, body):
+        parts = urlsplit(target)
+        self.method  = method
+        self.path    = parts.path.rstrip("/") or "/"
+        self.query   = dict(parse_qsl(parts.query))
+        self.headers = headers
+        self.body    = body
+
+    def json(self):
+        try:
+            return json.loads(self.body or b"null")
+        except ValueError:
+            raise HTTPError(400, "body is not valid JSON")
+
+class Response:
+    # Body is encoded once; gzip is computed lazily and kept, so cached responses compress once
+    def __init__(self, body: bytes, status=200, content_type="application/json", etag=None, headers=None):
+        self.body = body
+        self.status = status
+        self.content_type = content_type
+        self.etag = etag
+        self.headers = headers or {}
+        self._gz = None
+
+    def gzipped(self) -> bytes:
+        if self._gz is None:
+            self._gz = gzip.compress(self.body, compresslevel=6)
+        return self._gz
+
+def json_response(obj, status=200, etag=None, headers=None) -> Response:
+    body = json.dumps(obj, separators=(",", ":")).encode("utf-8")
+    if etag is None and status == 200:
+        etag = hashlib.sha1(body).hexdigest()[:20]
+    return Response(body, status=status, etag=f'"{etag}"' if etag else None, headers=headers)
+
+CORS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, DELETE, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type, If-None-Match",
+    "Access-Control-Expose-Headers": "ETag",
+}
+
+async def _read_request(reader):
+    line = await reader.readline()
+    if not line:
+        return None
+    try:
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+    except ValueError:
+        raise HTTPError(400, "malformed request line")
+    headers = {}
+    while True:
+        h = await reader.readline()
+        if h in (b"\r\n", b"\n", b""):
+            break
+        k, _, v = h.decode("latin-1").partition(":")
+        headers[k.strip().lower()] = v.strip()
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        length = -1
+    if length < 0:
+        raise HTTPError(400, "malformed Content-Length")
+    if length > MAX_BODY:
+        raise HTTPError(413)
+    body = await reader.readexactly(length) if length else b""
+    return Request(method.upper(), target, headers, body)
+
+def _write_response(writer, req, resp: Response, keep_alive: bool):
+    headers = dict(CORS)
+    headers.update(resp.headers)
+    body = resp.body
+    status = resp.status
+    if resp.etag:
+        headers["ETag"] = resp.etag
+        headers.setdefault("Cache-Control", "no-cache")  # browser revalidates with If-None-Match
+        if req is not None and req.method == "GET" and req.headers.get("if-none-match") == resp.etag:
+            status, body = 304, b""
+    if body and len(body) >= GZIP_MIN_BYTES and req is not None and "gzip" in req.headers.get("accept-encoding", ""):
+        body = resp.gzipped()
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+    if status != 304:
+        headers["Content-Type"] = resp.content_type
+    headers["Content-Length"] = str(len(body))
+    headers["Connection"] = "keep-alive" if keep_alive else "close"
+    head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+    head += "".join(f"{k}: {v}\r\n" for k, v in headers.items()) + "\r\n"
+    writer.write(head.encode("latin-1") + body)
+
+async def _dispatch(routes, req):
+    if req.method == "OPTIONS":
+        return Response(b"", status=204)
+    # exact match first, then the longest registered prefix ("/roster/" style routes)
+    handler = routes.get((req.method, req.path))
+    if handler is None:
+        prefixes = [p for (m, p) in routes if m == req.method and p.endswith("/") and req.path.startswith(p)]
+        if prefixes:
+            handler = routes[(req.method, max(prefixes, key=len))]
+    if handler is None:
+        if any(p == req.path for (_, p) in routes):
+            raise HTTPError(405)
+        raise HTTPError(404)
+    return await handler(req)
+
+def make_handler(routes):
+    async def handle(reader, writer):
+        try:
+            while True:
+                req = None
+                try:
+                    req = await _read_request(reader)
+                    if req is None:
+                        break
+                    resp = await _dispatch(routes, req)
+                except HTTPError as e:
+                    resp = json_response({"error": str(e)}, status=e.status)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:  # report, keep serving
+                    print(f"[local_http] {type(e).__name__}: {e}")
+                    resp = json_response({"error": "internal error"}, status=500)
+                keep_alive = req is not None and req.headers.get("connection", "").lower() != "close"
+                _write_response(writer, req, resp, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+    return handle
+
+async def start(routes, port: int):
+    return await asyncio.start_server(make_handler(routes), HOST, port)
+
+def serve(routes, port: int, on_start=None):
+    async def run():
+        server = await start(routes, port)
+        if on_start:
+            on_start()
+        print(f"Listening on http://{HOST}:{port}")
+        async with server:
+            await server.serve_forever()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
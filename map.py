@@ -1,17 +1,26 @@
 #!/usr/bin/env python3
-# IL+IN USPS-aligned ZIPs with rectangle selection → per-ZIP boundaries + union perimeter
+# IL+IN USPS-aligned ZIPs with rectangle/polygon/radius selection → per-ZIP boundaries + union perimeter
 # No triple-quoted strings; JS goes to an external file (zip_select.js)
 
 import geopandas as gpd
+import numpy as np
 import pandas as pd
+import shapely
 import folium
 from folium.plugins import Draw
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+import argparse
+import os
+
+import tracing
 
 # ---------------------- SETTINGS ----------------------
 LABEL_ZOOM   = 12   # labels appear at this zoom or higher (raise to 13 in dense areas)
 SIMPLIFY_TOL = 0.0  # 0.0 = no simplification (highest fidelity)
-CLEAN_GEOM   = True # run buffer(0) to fix minor topology issues
+CLEAN_GEOM   = True # repair invalid polygons (validity mask + make_valid; valid ones are untouched)
+REPAIR_CHUNK = 256  # invalid geometries per repair task
+REPAIR_WORKERS = os.cpu_count() or 2
 OUT_HTML     = "zip_map_il_in_select.html"
 OUT_JS       = "zip_select.js"
 # ------------------------------------------------------
@@ -21,29 +30,121 @@ BASE = ("https://services.arcgis.com/P3ePLMYs2RVChkJx/ArcGIS/rest/services/"
 IL_URL = f"{BASE}?where=STATE%20%3D%20'IL'&outFields=ZIP_CODE,PO_NAME,STATE&outSR=4326&f=geojson"
 IN_URL = f"{BASE}?where=STATE%20%3D%20'IN'&outFields=ZIP_CODE,PO_NAME,STATE&outSR=4326&f=geojson"
 
-def load_state(url: str) -> gpd.GeoDataFrame:
-    gdf = gpd.read_file(url)
-    gdf = gdf[["ZIP_CODE", "PO_NAME", "STATE", "geometry"]].rename(
-        columns={"ZIP_CODE": "zip", "PO_NAME": "city"}
-    )
+def _polygonal(g):
+    # make_valid can leave collapsed lines/points next to the polygon parts; keep the area only
+    if g is None or g.geom_type in ("Polygon", "MultiPolygon"):
+        return g
+    polys = [p for p in shapely.get_parts(g) if p.geom_type in ("Polygon", "MultiPolygon")]
+    return shapely.union_all(polys) if polys else None
+
+def _repair_chunk(geoms):
+    # -> (repaired geometries, error per geometry or None); shapely releases the GIL, so threads scale
+    try:
+        fixed = shapely.make_valid(geoms, method="structure", keep_collapsed=False)
+        return [_polygonal(g) for g in fixed], [None] * len(geoms)
+    except Exception:
+        out, errors = [], []
+        for g in geoms:   # one bad geometry: retry one by one so only it fails
+            try:
+                out.append(_polygonal(shapely.make_valid(g, method="structure", keep_collapsed=False)))
+                errors.append(None)
+            except Exception as e:
+                out.append(None)
+                errors.append(f"{type(e).__name__}: {e}")
+        return out, errors
+
+def clean_geometries(gdf: gpd.GeoDataFrame, workers: int = REPAIR_WORKERS) -> tuple[gpd.GeoDataFrame, list]:
+    # returns (gdf, records): one dict per invalid input geometry with zip, reason, status, error
+    geoms = gdf.geometry.to_numpy()
+    bad = np.flatnonzero(~shapely.is_valid(geoms) & ~shapely.is_missing(geoms))
+    if not len(bad):
+        return gdf, []
+    reasons = shapely.is_valid_reason(geoms[bad])
+    chunks = [geoms[bad[i:i + REPAIR_CHUNK]] for i in range(0, len(bad), REPAIR_CHUNK)]
+    if len(chunks) > 1 and workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_repair_chunk, chunks))
+    else:
+        results = [_repair_chunk(c) for c in chunks]
+    fixed = [g for r in results for g in r[0]]
+    errors = [e for r in results for e in r[1]]
+
+    records = []
+    geoms = geoms.copy()
+    zips = gdf["zip"].to_numpy() if "zip" in gdf else gdf.index.to_numpy()
+    for i, g, reason, err in zip(bad, fixed, reasons, errors):
+        ok = err is None and g is not None and not g.is_empty
+        if ok:
+            geoms[i] = g   # failed repairs keep the original polygon instead of dropping the ZIP
+        records.append({"zip": str(zips[i]), "reason": reason, "status": "repaired" if ok else "failed",
+                           "error": err or ("" if ok else "repair produced no polygon")})
+    gdf["geometry"] = geoms
+    return gdf, records
+
+def repair_report(records) -> pd.DataFrame:
+    # per-ZIP repair/failure counts from clean_geometries records
+    log = pd.DataFrame(records, columns=["zip", "reason", "status", "error"])
+    if log.empty:
+        return pd.DataFrame(columns=["zip", "repaired", "failed", "reason", "error"])
+    counts = log.pivot_table(index="zip", columns="status", aggfunc="size", fill_value=0)
+    counts = counts.reindex(columns=["repaired", "failed"], fill_value=0)
+    first = log.groupby("zip")[["reason", "error"]].first()
+    return counts.join(first).reset_index()
+
+def simplify_geometries(gdf: gpd.GeoDataFrame, tol: float) -> gpd.GeoDataFrame:
+    gdf["geometry"] = gdf.geometry.simplify(tol, preserve_topology=True)
+    return gdf
+
+def prepare_zips(gdf: gpd.GeoDataFrame, label: str = "", repairs=None) -> gpd.GeoDataFrame:
+    # rename/select + CRS + clean + simplify; used per state by load_state and per chunk by zip_ingest
+    # pass a list as `repairs` to collect the repair records for repair_report
+    gdf = gdf.rename(columns={"ZIP_CODE": "zip", "PO_NAME": "city"})[
+        ["zip", "city", "STATE", "geometry"]
+    ]
     if gdf.crs:
         gdf = gdf.to_crs(epsg=4326)
     if CLEAN_GEOM:
-        try:
-            gdf["geometry"] = gdf.buffer(0)  # fix tiny self-intersections
-        except Exception:
-            pass
+        with tracing.span(f"clean {label}", features=len(gdf)):
+            gdf, new = clean_geometries(gdf)
+        if repairs is not None:
+            repairs.extend(new)
+        if new:
+            failed = sum(r["status"] == "failed" for r in new)
+            print(f"{label}: repaired {len(new) - failed} invalid ZIP polygons, {failed} failed")
     if SIMPLIFY_TOL > 0:
-        gdf["geometry"] = gdf.geometry.simplify(SIMPLIFY_TOL, preserve_topology=True)
+        with tracing.span(f"simplify {label}", features=len(gdf)):
+            gdf = simplify_geometries(gdf, SIMPLIFY_TOL)
     return gdf
 
-# Load data
-gdf_il = load_state(IL_URL)
-gdf_in = load_state(IN_URL)
-gdf    = gpd.GeoDataFrame(pd.concat([gdf_il, gdf_in], ignore_index=True), crs="EPSG:4326")
+def load_state(url: str, label: str = "", repairs=None) -> gpd.GeoDataFrame:
+    label = label or Path(url).name
+    with tracing.span(f"fetch {label}"):
+        gdf = gpd.read_file(url)
+    return prepare_zips(gdf, label, repairs)
+
+def is_parquet(source) -> bool:
+    return Path(str(source)).suffix.lower() in (".parquet", ".pq")
 
-# ---------------------- MAP ----------------------
-m = folium.Map(location=(41.5, -88.0), zoom_start=8, tiles="cartodbpositron")
+def load_zips(source=None, repairs=None) -> gpd.GeoDataFrame:
+    # IL + IN from ArcGIS; pass a local snapshot (GeoJSON/GPKG, or GeoParquet from zip_ingest.py) to stay offline
+    if source and is_parquet(source):
+        from zip_ingest import read_zip_parquet
+        return read_zip_parquet(source)
+    if source:
+        return load_state(str(source), repairs=repairs)
+    gdf_il = load_state(IL_URL, "IL", repairs)
+    gdf_in = load_state(IN_URL, "IN", repairs)
+    return gpd.GeoDataFrame(pd.concat([gdf_il, gdf_in], ignore_index=True), crs="EPSG:4326")
+
+def load_zip_table(source=None) -> pd.DataFrame:
+    # ZIP/city/state attributes only (no geometry download) for validation and lookups
+    if source and is_parquet(source):
+        return pd.read_parquet(source, columns=["zip", "city", "STATE"], memory_map=True)
+    urls = [str(source)] if source else [IL_URL + "&returnGeometry=false", IN_URL + "&returnGeometry=false"]
+    frames = [pd.DataFrame(gpd.read_file(u, ignore_geometry=True)) for u in urls]
+    df = pd.concat(frames, ignore_index=True).rename(columns={"ZIP_CODE": "zip", "PO_NAME": "city"})
+    df["zip"] = df["zip"].astype(str).str.zfill(5)
+    return df[["zip", "city", "STATE"]]
 
 def base_style(_):
     return {"fillColor": "#8ecae6", "color": "#1d3557", "weight": 1, "fillOpacity": 0.15}
@@ -51,90 +152,33 @@ def base_style(_):
 def hover_style(_):
     return {"weight": 3, "color": "#e67e22", "fillOpacity": 0.20}
 
-gj = folium.GeoJson(
-    data=gdf.__geo_interface__,
-    name="ZIP Boundaries (USPS-aligned)",
-    style_function=base_style,
-    highlight_function=hover_style,
-    tooltip=folium.features.GeoJsonTooltip(
-        fields=["zip", "city", "STATE"], aliases=["ZIP", "City", "State"], sticky=True
-    ),
-).add_to(m)
-
-# Fit to IL + IN
-minx, miny, maxx, maxy = gdf.total_bounds
-m.fit_bounds([[miny, minx], [maxy, maxx]])
-
-# ---- Labels (separate layer; toggled by zoom) ----
-label_group = folium.FeatureGroup(name="ZIP Labels", show=False).add_to(m)
-reps = gdf.copy()
-reps["rep"] = reps.geometry.representative_point()
-for _, r in reps.iterrows():
-    folium.Marker(
-        [r["rep"].y, r["rep"].x],
-        icon=folium.DivIcon(
-            class_name="zip-label",
-            html=f"<div style='font-size:9pt;color:#0b132b;text-shadow:0 0 2px #fff;white-space:nowrap;'>{r['zip']}</div>",
+def add_zip_layer(m, gdf):
+    return folium.GeoJson(
+        data=gdf.__geo_interface__,
+        name="ZIP Boundaries (USPS-aligned)",
+        style_function=base_style,
+        highlight_function=hover_style,
+        tooltip=folium.features.GeoJsonTooltip(
+            fields=["zip", "city", "STATE"], aliases=["ZIP", "City", "State"], sticky=True
         ),
-    ).add_to(label_group)
-
-folium.LayerControl(collapsed=False).add_to(m)
-
-# ---- Draw control (rectangle only) ----
-Draw(
-    export=False,
-    position="topleft",
-    draw_options={
-        "polyline": False, "polygon": False, "circle": False,
-        "circlemarker": False, "marker": False, "rectangle": True,
-    },
-    edit_options={"edit": False, "remove": True},
-).add_to(m)
-
-# ---- Side panel (built without triple quotes) ----
-panel_html_lines = [
-    "<style>",
-    "#zip-results{position:absolute;top:10px;right:10px;z-index:9999;",
-    "background:rgba(255,255,255,0.96);padding:10px 12px;border-radius:8px;",
-    "box-shadow:0 6px 20px rgba(0,0,0,0.15);max-width:320px;max-height:50vh;overflow:auto;",
-    "font-family:system-ui,-apple-system,Segoe UI,Roboto,Helvetica,Arial;}",
-    "#zip-results h4{margin:0 0 6px 0;font-size:14px;}",
-    "#zip-results .small{color:#555;font-size:11px;margin-bottom:6px;}",
-    "#zip-results ul{margin:6px 0 0 16px;padding:0;font-size:12px;}",
-    "#zip-results button{margin-top:7px;padding:6px 8px;border:1px solid #ddd;",
-    "background:#f6f7f9;border-radius:6px;cursor:pointer;}",
-    "</style>",
-    "<div id='zip-results' hidden>",
-    "  <h4>Selected ZIPs</h4>",
-    "  <div class='small'>Drag a rectangle to select.</div>",
-    "  <ul id='zip-list'></ul>",
-    "  <button id='zip-clear'>Clear selection</button>",
-    "</div>",
-]
-m.get_root().html.add_child(folium.Element("\n".join(panel_html_lines)))
-
-# ---- Tiny inline script to expose variable names for external JS ----
-map_var    = m.get_name()
-layer_var  = gj.get_name()
-labels_var = label_group.get_name()
-
-setup_js = (
-    "<script>"
-    f"window._MAP='{map_var}';"
-    f"window._LAYER='{layer_var}';"
-    f"window._LABELS='{labels_var}';"
-    f"window._LABEL_ZOOM={LABEL_ZOOM};"
-    "</script>"
-)
-# Turf (for geometry ops), then our external JS
-m.get_root().html.add_child(folium.Element("<script src='https://cdn.jsdelivr.net/npm/@turf/turf@6/turf.min.js'></script>"))
-m.get_root().html.add_child(folium.Element(setup_js))
-m.get_root().html.add_child(folium.Element("<script src='zip_select.js'></script>"))
-
-# ---- Save HTML now (so we know where to write JS) ----
-m.save(OUT_HTML)
-
-# ---- Write external JS (no triple quotes) ----
+    ).add_to(m)
+
+def add_zip_labels(m, gdf):
+    # Labels (separate layer; toggled by zoom)
+    label_group = folium.FeatureGroup(name="ZIP Labels", show=False).add_to(m)
+    reps = gdf.copy()
+    reps["rep"] = reps.geometry.representative_point()
+    for _, r in reps.iterrows():
+        folium.Marker(
+            [r["rep"].y, r["rep"].x],
+            icon=folium.DivIcon(
+                class_name="zip-label",
+                html=f"<div style='font-size:9pt;color:#0b132b;text-shadow:0 0 2px #fff;white-space:nowrap;'>{r['zip']}</div>",
+            ),
+        ).add_to(label_group)
+    return label_group
+
+# ---- External JS for the folium page (no triple quotes; written by main) ----
 js_lines = [
 "(function(){",
 "  function ready(){",
@@ -164,7 +208,7 @@ js_lines = [
 "      });",
 "    });",
 "",
-"    // 3) Rectangle selection → list ZIPs, outline each ZIP, and draw union perimeter",
+"    // 3) Rectangle / polygon / radius selection → list ZIPs, outline each ZIP, and draw union perimeter",
 "    var rectHighlighted = [];   // polygon layers we touched",
 "    var perZipEdges = null;     // L.geoJSON of per-ZIP boundaries",
 "    var unionOutline = null;    // L.geoJSON of union perimeter",
@@ -226,27 +270,31 @@ js_lines = [
 "      }",
 "    }",
 "",
+"    // query shape for each draw mode: rectangle / freehand polygon as drawn, circle as a geodesic polygon",
+"    function selectionShape(e){",
+"      if(e.layerType==='circle'){",
+"        var c=e.layer.getLatLng();",
+"        return turf.circle([c.lng,c.lat], e.layer.getRadius()/1000, {units:'kilometers', steps:128});",
+"      }",
+"      if(e.layerType==='rectangle' || e.layerType==='polygon') return e.layer.toGeoJSON();",
+"      return null;",
+"    }",
+"",
 "    map.on(L.Draw.Event.CREATED, function(e){",
-"      if(e.layerType!=='rectangle') return;",
-"      var b=e.layer.getBounds();",
-"      var rectPoly=turf.polygon([[",
-"        [b.getWest(), b.getSouth()],",
-"        [b.getEast(), b.getSouth()],",
-"        [b.getEast(), b.getNorth()],",
-"        [b.getWest(), b.getNorth()],",
-"        [b.getWest(), b.getSouth()]",
-"      ]]);",
+"      var shape=selectionShape(e);",
+"      if(!shape) return;",
+"      var sb=turf.bbox(shape);",
 "",
 "      var hits=[];",
 "      zipLayer.eachLayer(function(l){",
 "        var f=l.feature; if(!f) return;",
 "        var bb = l.getBounds ? l.getBounds() : null;",
 "        if(bb){",
-"          if(bb.getEast()<b.getWest() || bb.getWest()>b.getEast() ||",
-"             bb.getNorth()<b.getSouth() || bb.getSouth()>b.getNorth()){ return; }",
+"          if(bb.getEast()<sb[0] || bb.getWest()>sb[2] ||",
+"             bb.getNorth()<sb[1] || bb.getSouth()>sb[3]){ return; }",
 "        }",
 "        try{",
-"          if(turf.booleanIntersects(f,rectPoly)){",
+"          if(turf.booleanIntersects(f,shape)){",
 "            // subtle style on underlying fills",
 "            l.setStyle({weight:2,color:'#607d8b',fillOpacity:0.08});",
 "            if(l.bringToFront) l.bringToFront();",
@@ -273,6 +321,98 @@ js_lines = [
 "  setTimeout(ready,0);",
 "})();",
 ]
-Path(OUT_JS).write_text("\n".join(js_lines), encoding="utf-8")
+def main():
+    ap = argparse.ArgumentParser(description="Build the IL+IN ZIP selection map.")
+    ap.add_argument("--trace", metavar="JSON", help="write per-stage timing/memory as Chrome trace JSON")
+    ap.add_argument("--repair-report", metavar="CSV", help="write per-ZIP geometry repair counts/failures")
+    args = ap.parse_args()
+    if args.trace:
+        tracing.enable()
+
+    # Load data
+    repairs = []
+    gdf = load_zips(repairs=repairs)
+    if args.repair_report:
+        repair_report(repairs).to_csv(args.repair_report, index=False)
+
+    # ---------------------- MAP ----------------------
+    m = folium.Map(location=(41.5, -88.0), zoom_start=8, tiles="cartodbpositron")
+
+    with tracing.span("geojson layer", features=len(gdf)):
+        gj = add_zip_layer(m, gdf)
+
+    # Fit to IL + IN
+    minx, miny, maxx, maxy = gdf.total_bounds
+    m.fit_bounds([[miny, minx], [maxy, maxx]])
+
+    # ---- Labels (separate layer; toggled by zoom) ----
+    with tracing.span("labels", features=len(gdf)):
+        label_group = add_zip_labels(m, gdf)
+
+    folium.LayerControl(collapsed=False).add_to(m)
+
+    # ---- Draw control (rectangle, freehand polygon, radius circle) ----
+    Draw(
+        export=False,
+        position="topleft",
+        draw_options={
+            "polyline": False, "polygon": {"allowIntersection": False}, "circle": {"metric": False, "feet": False},
+            "circlemarker": False, "marker": False, "rectangle": True,
+        },
+        edit_options={"edit": False, "remove": True},
+    ).add_to(m)
+
+    # ---- Side panel (built without triple quotes) ----
+    panel_html_lines = [
+        "<style>",
+        "#zip-results{position:absolute;top:10px;right:10px;z-index:9999;",
+        "background:rgba(255,255,255,0.96);padding:10px 12px;border-radius:8px;",
+        "box-shadow:0 6px 20px rgba(0,0,0,0.15);max-width:320px;max-height:50vh;overflow:auto;",
+        "font-family:system-ui,-apple-system,Segoe UI,Roboto,Helvetica,Arial;}",
+        "#zip-results h4{margin:0 0 6px 0;font-size:14px;}",
+        "#zip-results .small{color:#555;font-size:11px;margin-bottom:6px;}",
+        "#zip-results ul{margin:6px 0 0 16px;padding:0;font-size:12px;}",
+        "#zip-results button{margin-top:7px;padding:6px 8px;border:1px solid #ddd;",
+        "background:#f6f7f9;border-radius:6px;cursor:pointer;}",
+        "</style>",
+        "<div id='zip-results' hidden>",
+        "  <h4>Selected ZIPs</h4>",
+        "  <div class='small'>Draw a rectangle, polygon or circle to select.</div>",
+        "  <ul id='zip-list'></ul>",
+        "  <button id='zip-clear'>Clear selection</button>",
+        "</div>",
+    ]
+    m.get_root().html.add_child(folium.Element("\n".join(panel_html_lines)))
+
+    # ---- Tiny inline script to expose variable names for external JS ----
+    map_var    = m.get_name()
+    layer_var  = gj.get_name()
+    labels_var = label_group.get_name()
+
+    setup_js = (
+        "<script>"
+        f"window._MAP='{map_var}';"
+        f"window._LAYER='{layer_var}';"
+        f"window._LABELS='{labels_var}';"
+        f"window._LABEL_ZOOM={LABEL_ZOOM};"
+        "</script>"
+    )
+    # Turf (for geometry ops), then our external JS
+    m.get_root().html.add_child(folium.Element("<script src='https://cdn.jsdelivr.net/npm/@turf/turf@6/turf.min.js'></script>"))
+    m.get_root().html.add_child(folium.Element(setup_js))
+    m.get_root().html.add_child(folium.Element("<script src='zip_select.js'></script>"))
+
+    # ---- Save HTML now (so we know where to write JS) ----
+    with tracing.span("save html"):
+        m.save(OUT_HTML)
+
+    # ---- Write external JS ----
+    Path(OUT_JS).write_text("\n".join(js_lines), encoding="utf-8")
+    if args.trace:
+        tracing.export(args.trace)
+        print(tracing.summary())
+
+    print(f"Map saved to {OUT_HTML}\nWrote helper JS to {OUT_JS}\nOpen the HTML in a browser with {OUT_JS} in the same folder.")
 
-print(f"Map saved to {OUT_HTML}\nWrote helper JS to {OUT_JS}\nOpen the HTML in a browser with {OUT_JS} in the same folder.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# Nearest-technician fallback for ZIPs/jobs that no technician covers.
+# Each technician contributes the representative point of every ZIP they cover plus their territory
+# centroid; the points go into one KD-tree on unit-sphere xyz, where straight-line (chord) order equals
+# great-circle order, so a plain Euclidean k-NN query gives great-circle nearest neighbours.
+#
+# Usage: python nearest_tech.py --roster roster.json [--zips zips_snapshot.geojson] [-k 3] [ZIP ...]
+#        (no ZIPs: writes suggestions for every uncovered ZIP in the dataset to uncovered_nearest.csv)
+#        python assign_jobs.py jobs.csv --roster roster.json --nearest 3
+
+import argparse
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import shapely
+from scipy.spatial import cKDTree
+
+from map import load_zips
+
+# ---------------------- SETTINGS ----------------------
+EARTH_RADIUS_MI = 3958.8
+OVERSAMPLE      = 8      # neighbours fetched per wanted technician (techs own many nearby points)
+QUERY_BATCH     = 20_000 # rows per dedupe pass (keeps the n x kk arrays small)
+MAX_KK          = 256    # widest shared-tree search; rows still short switch to per-technician trees
+PER_TECH_CELLS  = 2_000_000  # rows x technicians per exact per-technician pass
+OUT_CSV         = "uncovered_nearest.csv"
+# ------------------------------------------------------
+
+def unit_xyz(lon, lat) -> np.ndarray:
+    lon, lat = np.radians(np.asarray(lon, dtype=float)), np.radians(np.asarray(lat, dtype=float))
+    c = np.cos(lat)
+    return np.column_stack([c * np.cos(lon), c * np.sin(lon), np.sin(lat)])
+
+def chord_to_miles(chord) -> np.ndarray:
+    return 2 * EARTH_RADIUS_MI * np.arcsin(np.clip(np.asarray(chord) / 2, 0, 1))
+
+def miles_to_chord(miles) -> np.ndarray:
+    return 2 * np.sin(np.minimum(np.asarray(miles, dtype=float) / (2 * EARTH_RADIUS_MI), np.pi / 2))
+
+class NearestTechIndex:
+    def __init__(self, zips_gdf, roster):
+        self.techs = [t for t in roster if t.get("zips")]
+        reps = zips_gdf.geometry.representative_point()
+        rep_xy = pd.DataFrame({"x": reps.x.to_numpy(), "y": reps.y.to_numpy(), "w": shapely.area(zips_gdf.geometry.to_numpy())},
+                              index=zips_gdf["zip"].astype(str)).groupby(level=0).first()
+        self.rep_xy = rep_xy
+
+        # one row per (tech, covered ZIP) -> representative points
+        pairs = pd.DataFrame([(i, str(z)) for i, t in enumerate(self.techs) for z in t["zips"]], columns=["tech", "zip"])
+        pairs = pairs.join(rep_xy, on="zip", how="inner")
+        # territory centroid = area-weighted mean of ZIP representative points (no union needed)
+        cent = pairs.assign(wx=pairs.x * pairs.w, wy=pairs.y * pairs.w).groupby("tech")[["wx", "wy", "w"]].sum()
+        cent = pd.DataFrame({"tech": cent.index, "x": cent.wx / cent.w, "y": cent.wy / cent.w})
+
+        pts = pd.concat([pairs[["tech", "x", "y"]], cent], ignore_index=True)
+        self.point_tech = pts["tech"].to_numpy(dtype=np.int64)
+        self.xyz = unit_xyz(pts["x"], pts["y"])
+        self.tree = cKDTree(self.xyz)
+        self.tech_trees = None   # built on first use by _nearest_per_tech
+
+    def query_many(self, lon, lat, k=3):
+        # -> (tech index array (n,k), miles (n,k)); -1 / nan pads when fewer than k technicians exist
+        n = len(lon)
+        if n > QUERY_BATCH:
+            parts = [self.query_many(lon[i:i + QUERY_BATCH], lat[i:i + QUERY_BATCH], k) for i in range(0, n, QUERY_BATCH)]
+            return np.vstack([p[0] for p in parts]), np.vstack([p[1] for p in parts])
+        tech_idx = np.full((n, k), -1, dtype=np.int64)
+        miles = np.full((n, k), np.nan)
+        if not len(self.point_tech):
+            return tech_idx, miles
+        xyz = unit_xyz(lon, lat)
+        want = min(k, len(self.techs))
+        todo = np.arange(n)
+        kk = int(min(len(self.point_tech), max(k, min(k * OVERSAMPLE, MAX_KK))))
+        while len(todo):
+            t, d = self._nearest_distinct(xyz[todo], k, kk)
+            tech_idx[todo], miles[todo] = t, d
+            # rows whose kk neighbours all belong to fewer than k techs: widen the search and retry,
+            # and past MAX_KK (one tech owning a dense cluster) query each technician's own tree instead
+            short = (t >= 0).sum(axis=1) < want
+            if kk >= len(self.point_tech) or not short.any():
+                break
+            todo = todo[short]
+            if kk >= MAX_KK:
+                tech_idx[todo], miles[todo] = self._nearest_per_tech(xyz[todo], k)
+                break
+            kk = int(min(len(self.point_tech), MAX_KK, kk * 4))
+        return tech_idx, miles
+
+    def _nearest_distinct(self, xyz, k, kk):
+        n = len(xyz)
+        tech_idx = np.full((n, k), -1, dtype=np.int64)
+        miles = np.full((n, k), np.nan)
+        chord, nb = self.tree.query(xyz, k=kk)
+        chord, nb = chord.reshape(n, kk), nb.reshape(n, kk)
+        ok = np.isfinite(chord)
+        t = np.where(ok, self.point_tech[np.minimum(nb, len(self.point_tech) - 1)], -1)
+        # keep only the first (closest) hit per technician in each row: a stable sort by tech id keeps
+        # distance order within each tech, so the head of every run is that tech's nearest point
+        rows = np.arange(n)[:, None]
+        by_tech = np.argsort(t, axis=1, kind="stable")
+        ts = t[rows, by_tech]
+        head = np.ones_like(ts, dtype=bool)
+        head[:, 1:] = ts[:, 1:] != ts[:, :-1]
+        first = np.zeros_like(head)
+        first[rows, by_tech] = head
+        first &= ok
+        order = np.argsort(~first, axis=1, kind="stable")[:, :k]
+        keep = first[rows, order]
+        tech_idx[:, :order.shape[1]] = np.where(keep, t[rows, order], -1)
+        miles[:, :order.shape[1]] = np.where(keep, chord_to_miles(chord[rows, order]), np.nan)
+        return tech_idx, miles
+
+    def _nearest_per_tech(self, xyz, k):
+        # exact: nearest point of every technician, then the k closest technicians (rows x techs memory)
+        if self.tech_trees is None:
+            self.tech_trees = [cKDTree(self.xyz[self.point_tech == i]) for i in range(len(self.techs))]
+        n, kt = len(xyz), min(k, len(self.techs))
+        tech_idx = np.full((n, k), -1, dtype=np.int64)
+        miles = np.full((n, k), np.nan)
+        step = max(1, PER_TECH_CELLS // max(len(self.techs), 1))
+        for a in range(0, n, step):
+            q = xyz[a:a + step]
+            chord = np.column_stack([tr.query(q, k=1)[0] if tr.n else np.full(len(q), np.inf) for tr in self.tech_trees])
+            order = np.argsort(chord, axis=1, kind="stable")[:, :kt]
+            d = np.take_along_axis(chord, order, axis=1)
+            ok = np.isfinite(d)
+            tech_idx[a:a + step, :kt] = np.where(ok, order, -1)
+            miles[a:a + step, :kt] = np.where(ok, chord_to_miles(np.where(ok, d, 0)), np.nan)
+        return tech_idx, miles
+
+    def query(self, lon: float, lat: float, k=3) -> list:
+        idx, mi = self.query_many([lon], [lat], k)
+        return [(self.techs[i], float(d)) for i, d in zip(idx[0], mi[0]) if i >= 0]
+
+    def for_zip(self, zip_code: str, k=3) -> list:
+        # KeyError for a ZIP that is not in the dataset
+        r = self.rep_xy.loc[str(zip_code)]
+        return self.query(r.x, r.y, k)
+
+    def label_columns(self, tech_idx, miles) -> dict:
+        # "|"-joined ids/names/miles per row, matching assign_jobs' tech_ids/tech_names columns
+        ids = np.array([str(t["id"]) for t in self.techs] + [""], dtype=object)
+        names = np.array([t["name"] for t in self.techs] + [""], dtype=object)
+        join = lambda a: ["|".join(v for v in row if v) for row in a]
+        mi = np.where(np.isnan(miles), "", np.char.mod("%.1f", np.nan_to_num(miles)))
+        return {"nearest_tech_ids": join(ids[tech_idx]), "nearest_tech_names": join(names[tech_idx]),
+                "nearest_miles": join(mi)}
+
+def main():
+    ap = argparse.ArgumentParser(description="k nearest technicians for ZIPs no technician covers.")
+    ap.add_argument("codes", nargs="*", metavar="ZIP", help="ZIP codes to look up (default: every uncovered ZIP)")
+    ap.add_argument("--roster", required=True, type=Path)
+    ap.add_argument("--zips", help="local ZIP snapshot (default: fetch IL+IN from ArcGIS)")
+    ap.add_argument("-k", type=int, default=3)
+    args = ap.parse_args()
+
+    roster = json.loads(args.roster.read_text(encoding="utf-8"))
+    index = NearestTechIndex(load_zips(args.zips), roster)
+    if args.codes:
+        for z in args.codes:
+            try:
+                near = index.for_zip(z, args.k)
+            except KeyError:
+                print(f"{z}: ZIP not in dataset")
+                continue
+            hits = ", ".join(f"{t['name']} ({mi:.1f} mi)" for t, mi in near)
+            print(f"{z}: {hits or 'no technicians'}")
+        return
+
+    covered = {str(z) for t in roster for z in t.get("zips", [])}
+    todo = index.rep_xy[~index.rep_xy.index.isin(covered)]
+    tech_idx, miles = index.query_many(todo.x.to_numpy(), todo.y.to_numpy(), args.k)
+    out = pd.DataFrame({"zip": todo.index, **index.label_columns(tech_idx, miles)})
+    out.to_csv(OUT_CSV, index=False)
+    print(f"Wrote nearest-technician suggestions for {len(out)} uncovered ZIPs to {OUT_CSV}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# Bulk technician roster import from CSV/XLSX (one row per technician-ZIP, or a ZIP list per cell).
+# Rows are streamed and validated in fixed-size chunks against the ZIP dataset with vectorized lookups;
+# problems (unknown ZIP, duplicate, wrong state) stream to an issues CSV, so memory stays at
+# one chunk plus the roster being built.
+#
+# Usage: python roster_import.py techs.xlsx [--out roster.json] [--issues roster_issues.csv]
+#                                [--zips zips_snapshot.geojson] [--states IL,IN] [--db roster.db]
+#        python build_service_coverage_page.py --roster roster.json
+
+import argparse
+import csv
+import json
+from pathlib import Path
+
+import pandas as pd
+
+from map import load_zip_table
+
+# ---------------------- SETTINGS ----------------------
+CHUNK_ROWS = 50_000
+OUT_JSON   = "roster.json"
+OUT_ISSUES = "roster_issues.csv"
+# ------------------------------------------------------
+
+# Accepted header spellings (case/space-insensitive)
+COLUMNS = {
+    "name":    ["name", "technician", "tech", "technician name", "tech name"],
+    "contact": ["contact", "phone", "email", "contact info"],
+    "zip":     ["zip", "zips", "zip code", "zip_code", "zipcode", "postal code"],
+    "state":   ["state", "st"],
+}
+
+def _map_header(header) -> dict:
+    norm = {str(h or "").strip().lower().replace("_", " "): i for i, h in enumerate(header)}
+    found = {}
+    for key, names in COLUMNS.items():
+        for n in names:
+            if n.replace("_", " ") in norm:
+                found[key] = norm[n.replace("_", " ")]
+                break
+    if "name" not in found or "zip" not in found:
+        raise SystemExit(f"Header needs a technician name and a ZIP column; got {list(header)}")
+    return found
+
+def _cell(v) -> str:
+    # Excel hands numeric ZIPs back as numbers and drops leading zeros
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    if isinstance(v, int):
+        return f"{v:05d}"
+    return "" if v is None else str(v).strip()
+
+def iter_rows(path: Path):
+    # Yields (header, row) tuples without loading the whole file
+    if path.suffix.lower() in (".xlsx", ".xlsm"):
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise SystemExit("Reading .xlsx needs openpyxl (pip install openpyxl)")
+        wb = load_workbook(path, read_only=True, data_only=True)
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None) or []
+        for r in rows:
+            yield header, r
+        wb.close()
+    else:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            rows = csv.reader(f)
+            header = next(rows, None) or []
+            for r in rows:
+                yield header, r
+
+def iter_chunks(path: Path, size=CHUNK_ROWS):
+    cols, buf, line = None, [], 1
+    for header, r in iter_rows(path):
+        line += 1
+        if cols is None:
+            cols = _map_header(header)
+        if not any(r):
+            continue
+        get = lambda k: _cell(r[cols[k]]) if k in cols and cols[k] < len(r) else ""
+        buf.append((line, get("name"), get("contact"), get("zip"), get("state").upper()))
+        if len(buf) >= size:
+            yield pd.DataFrame(buf, columns=["line", "name", "contact", "zip_cell", "state"])
+            buf = []
+    if buf:
+        yield pd.DataFrame(buf, columns=["line", "name", "contact", "zip_cell", "state"])
+
+def explode_zips(df: pd.DataFrame) -> pd.DataFrame:
+    # Same rule as the page's parseZips(): split on commas/whitespace, keep the first 5-digit run per token
+    df = df.assign(token=df["zip_cell"].str.split(r"[,;\s]+", regex=True)).explode("token")
+    # drop empty tokens (leading/trailing separators), then add one row back for cells with no token at all
+    has = df["token"].fillna("").ne("")
+    empty = ~has.groupby(level=0).any()
+    blank = df[~has & empty.reindex(df.index).to_numpy()]
+    df = pd.concat([df[has], blank[~blank.index.duplicated()].assign(token="")]).sort_index(kind="stable").reset_index(drop=True)
+    df["zip"] = df["token"].str.extract(r"(\d{5})", expand=False)
+    return df.drop(columns=["zip_cell"])
+
+def name_key(name) -> str:
+    # technicians are matched by name, case- and whitespace-insensitive
+    return " ".join(str(name or "").casefold().split())
+
+def store_ids(roster, existing) -> list:
+    # For an import into a roster store: techs already in the store (same name key) keep their store id,
+    # new techs go in without an id so the store allocates one instead of overwriting ids 1..N
+    ids = {name_key(t["name"]): t["id"] for t in existing}
+    return [dict(t, id=ids[name_key(t["name"])]) if name_key(t["name"]) in ids
+            else {k: v for k, v in t.items() if k != "id"} for t in roster]
+
+class RosterBuilder:
+    def __init__(self, zip_states: pd.Series, allowed_states=None):
+        self.zip_states = zip_states          # ZIP -> state, from the ZIP dataset
+        self.allowed = set(allowed_states or [])
+        self.techs = {}                       # name key -> {"id","name","contact","zips": set}
+        self.counts = {"rows": 0, "zips": 0, "unknown": 0, "duplicate": 0, "wrong_state": 0, "malformed": 0, "no_name": 0}
+
+    def add_chunk(self, df: pd.DataFrame):
+        self.counts["rows"] += len(df)
+        df = explode_zips(df)
+        df["key"] = df["name"].map(name_key)
+        issue = pd.Series("", index=df.index)
+
+        issue[df["key"].fillna("").eq("")] = "no_name"
+        issue[(issue == "") & df["zip"].isna()] = "malformed"
+
+        ds_state = df["zip"].map(self.zip_states)
+        issue[(issue == "") & ds_state.isna()] = "unknown"
+        wrong = df["state"].ne("") & ds_state.notna() & df["state"].ne(ds_state)
+        if self.allowed:
+            wrong |= ds_state.notna() & ~ds_state.isin(self.allowed)
+        issue[(issue == "") & wrong] = "wrong_state"
+
+        # duplicates within the chunk, then against ZIPs already assigned in earlier chunks
+        # (only valid rows count, so a rejected row never shadows a later valid one)
+        ok = issue == ""
+        keys = df["key"].str.cat(df["zip"].fillna(""), sep="|")
+        issue[keys[ok].duplicated().reindex(df.index, fill_value=False)] = "duplicate"
+        for key, g in df[issue == ""].groupby("key", sort=False):
+            t = self.techs.get(key)
+            contacts = g["contact"][g["contact"].ne("")]
+            if t is None:
+                t = self.techs[key] = {"id": len(self.techs) + 1, "name": g["name"].iat[0], "contact": "", "zips": set()}
+            if not t["contact"] and len(contacts):
+                t["contact"] = contacts.iat[0]
+            seen = g["zip"].isin(t["zips"])
+            issue[g.index[seen]] = "duplicate"
+            t["zips"].update(g["zip"][~seen])
+
+        for k, n in issue[issue != ""].value_counts().items():
+            self.counts[k] += int(n)
+        self.counts["zips"] += int((issue == "").sum())
+        bad = df[issue != ""].assign(issue=issue[issue != ""], state_in_data=ds_state[issue != ""])
+        return bad[["line", "name", "token", "zip", "state", "state_in_data", "issue"]]
+
+    def roster(self) -> list:
+        return [{"id": t["id"], "name": t["name"], "contact": t["contact"], "zips": sorted(t["zips"])}
+                for t in self.techs.values() if t["zips"]]
+
+def main():
+    ap = argparse.ArgumentParser(description="Stream a CSV/XLSX technician roster into a validated roster JSON.")
+    ap.add_argument("source", type=Path)
+    ap.add_argument("--out", default=OUT_JSON, type=Path)
+    ap.add_argument("--issues", default=OUT_ISSUES, type=Path)
+    ap.add_argument("--zips", help="local ZIP snapshot to validate against (default: ArcGIS IL+IN attributes)")
+    ap.add_argument("--states", help="comma-separated states the roster may cover, e.g. IL,IN")
+    ap.add_argument("--db", help="also upsert the result into this roster store (roster_store.py)")
+    ap.add_argument("--chunk", type=int, default=CHUNK_ROWS)
+    args = ap.parse_args()
+
+    table = load_zip_table(args.zips)
+    zip_states = table.drop_duplicates("zip").set_index("zip")["STATE"]
+    allowed = [s.strip().upper() for s in args.states.split(",")] if args.states else None
+    builder = RosterBuilder(zip_states, allowed)
+
+    with open(args.issues, "w", newline="", encoding="utf-8") as f:
+        header = True
+        for chunk in iter_chunks(args.source, args.chunk):
+            bad = builder.add_chunk(chunk)
+            if len(bad):
+                bad.to_csv(f, index=False, header=header)
+                header = False
+
+    roster = builder.roster()
+    if args.db:
+        from roster_store import RosterStore
+        store = RosterStore(args.db)
+        before = store.version()
+        saved = store.upsert_many(store_ids(roster, store.all_techs()))   # unchanged techs keep their version
+        roster = [{k: t[k] for k in ("id", "name", "contact", "zips")} for t in saved]   # JSON gets the store ids
+        print(f"Store {args.db}: {sum(t['version'] > before for t in saved)} technicians changed "
+              f"(version {before} -> {store.version()})")
+    args.out.write_text(json.dumps(roster, ensure_ascii=False, indent=1), encoding="utf-8")
+
+    c = builder.counts
+    print(f"Read {c['rows']} rows -> {len(roster)} technicians, {c['zips']} ZIP assignments ({args.out})")
+    print(f"Issues: {c['unknown']} unknown ZIPs, {c['duplicate']} duplicates, {c['wrong_state']} wrong-state, "
+          f"{c['malformed']} malformed, {c['no_name']} without a name ({args.issues})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# Shared technician roster in SQLite with versioned changes, so pages sync deltas instead of whole rosters.
+# Every real change (upsert/delete) bumps one global version; rows keep the version of their last change
+# (deletes stay as tombstones), so "what changed since v" is a single indexed range scan.
+#
+# Usage: python roster_store.py seed [roster.json]       (default: DEFAULT_TECHS from the page builder)
+#        python roster_store.py serve [--port 8766]
+#        python build_service_coverage_page.py --roster-db roster.db --roster-api http://127.0.0.1:8766
+
+import argparse
+import json
+import sqlite3
+from pathlib import Path
+
+from local_http import HTTPError, json_response, serve
+
+# ---------------------- SETTINGS ----------------------
+DB_PATH = "roster.db"
+PORT    = 8766
+# ------------------------------------------------------
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS techs ("
+    " id INTEGER PRIMARY KEY, name TEXT NOT NULL, contact TEXT NOT NULL DEFAULT '',"
+    " zips TEXT NOT NULL DEFAULT '[]', version INTEGER NOT NULL, deleted INTEGER NOT NULL DEFAULT 0)",
+    "CREATE INDEX IF NOT EXISTS techs_version ON techs(version)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO meta(key, value) VALUES ('version', 0)",
+]
+
+def clean_tech(t: dict) -> dict:
+    # Same rules as the page's addTech(): name required, ZIPs are unique sorted 5-digit strings
+    if not isinstance(t, dict):
+        raise ValueError("technician must be an object")
+    name = str(t.get("name") or "").strip()
+    if not name:
+        raise ValueError("name is required")
+    zips = t.get("zips")
+    if not isinstance(zips, (list, tuple)):
+        raise ValueError("zips must be a list of 5-digit ZIPs")
+    zips = sorted({z for z in (str(z).strip() for z in zips) if len(z) == 5 and z.isdigit()})
+    if not zips:
+        raise ValueError("at least one valid 5-digit ZIP is required")
+    out = {"name": name, "contact": str(t.get("contact") or "").strip(), "zips": zips}
+    if t.get("id") is not None:
+        out["id"] = int(t["id"])
+    return out
+
+def _row(r) -> dict:
+    if r["deleted"]:
+        return {"id": r["id"], "version": r["version"], "deleted": True}
+    return {"id": r["id"], "name": r["name"], "contact": r["contact"], "zips": json.loads(r["zips"]), "version": r["version"]}
+
+class RosterStore:
+    def __init__(self, path=DB_PATH):
+        self.db = sqlite3.connect(str(path), isolation_level=None, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.execute("PRAGMA journal_mode=WAL")
+        for stmt in SCHEMA:
+            self.db.execute(stmt)
+
+    def version(self) -> int:
+        return self.db.execute("SELECT value FROM meta WHERE key='version'").fetchone()[0]
+
+    def _bump(self) -> int:
+        self.db.execute("UPDATE meta SET value = value + 1 WHERE key='version'")
+        return self.version()
+
+    def all_techs(self) -> list:
+        rows = self.db.execute("SELECT * FROM techs WHERE deleted=0 ORDER BY id").fetchall()
+        return [{"id": r["id"], "name": r["name"], "contact": r["contact"], "zips": json.loads(r["zips"])} for r in rows]
+
+    def changes_since(self, since: int) -> dict:
+        # since=0 (or older than anything we hold) -> full roster without tombstones
+        v = self.version()
+        if since <= 0 or since > v:
+            techs = self.db.execute("SELECT * FROM techs WHERE deleted=0 ORDER BY id").fetchall()
+            return {"version": v, "full": True, "changes": [_row(r) for r in techs]}
+        rows = self.db.execute("SELECT * FROM techs WHERE version > ? ORDER BY version", (since,)).fetchall()
+        return {"version": v, "full": False, "changes": [_row(r) for r in rows]}
+
+    def upsert_many(self, techs) -> list:
+        # One version per changed technician, all in one transaction; unchanged rows keep their version
+        # so re-saving the same roster doesn't grow the next ?since= delta
+        techs = [clean_tech(t) for t in techs]
+        out = []
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            for t in techs:
+                if "id" in t:
+                    r = self.db.execute("SELECT * FROM techs WHERE id=?", (t["id"],)).fetchone()
+                    if r is not None and not r["deleted"] and (r["name"], r["contact"], json.loads(r["zips"])) == (t["name"], t["contact"], t["zips"]):
+                        out.append(_row(r))
+                        continue
+                v = self._bump()
+                if "id" in t:
+                    self.db.execute(
+                        "INSERT INTO techs(id, name, contact, zips, version, deleted) VALUES (?,?,?,?,?,0) "
+                        "ON CONFLICT(id) DO UPDATE SET name=excluded.name, contact=excluded.contact, "
+                        "zips=excluded.zips, version=excluded.version, deleted=0",
+                        (t["id"], t["name"], t["contact"], json.dumps(t["zips"]), v))
+                    tid = t["id"]
+                else:
+                    tid = self.db.execute(
+                        "INSERT INTO techs(name, contact, zips, version) VALUES (?,?,?,?)",
+                        (t["name"], t["contact"], json.dumps(t["zips"]), v)).lastrowid
+                out.append(dict(t, id=tid, version=v))
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+        return out
+
+    def upsert(self, tech: dict) -> dict:
+        return self.upsert_many([tech])[0]
+
+    def delete(self, tech_id: int) -> int:
+        self.db.execute("BEGIN IMMEDIATE")
+        try:
+            v = self._bump()
+            n = self.db.execute("UPDATE techs SET deleted=1, version=? WHERE id=? AND deleted=0", (v, int(tech_id))).rowcount
+            if not n:
+                self.db.execute("ROLLBACK")
+                return 0
+            self.db.execute("COMMIT")
+        except Exception:
+            self.db.execute("ROLLBACK")
+            raise
+        return v
+
+    def seed(self, techs) -> int:
+        # Only fills an empty store; never clobbers a shared roster
+        if self.db.execute("SELECT COUNT(*) FROM techs").fetchone()[0]:
+            return 0
+        return len(self.upsert_many(techs))
+
+    # ---- HTTP routes (mounted by this file's `serve` and by zip_api_server.py --roster-db) ----
+    def routes(self) -> dict:
+        async def get_roster(req):
+            try:
+                since = int(req.query.get("since", 0))
+            except ValueError:
+                raise HTTPError(400, "since must be an integer")
+            return json_response(self.changes_since(since))
+
+        async def post_roster(req):
+            body = req.json()
+            techs = body.get("techs") if isinstance(body, dict) and "techs" in body else [body]
+            if not isinstance(techs, list):
+                raise HTTPError(400, 'expected a technician or {"techs": [...]}')
+            try:
+                saved = self.upsert_many(techs)
+            except (ValueError, TypeError) as e:
+                raise HTTPError(400, str(e))
+            return json_response({"version": self.version(), "techs": saved})
+
+        async def delete_roster(req):
+            try:
+                tech_id = int(req.path.rsplit("/", 1)[1])
+            except ValueError:
+                raise HTTPError(400, "expected /roster/<id>")
+            v = self.delete(tech_id)
+            if not v:
+                raise HTTPError(404, "no such technician")
+            return json_response({"version": v, "id": tech_id})
+
+        return {
+            ("GET", "/roster"): get_roster,
+            ("POST", "/roster"): post_roster,
+            ("DELETE", "/roster/"): delete_roster,
+        }
+
+def main():
+    ap = argparse.ArgumentParser(description="SQLite technician roster store.")
+    ap.add_argument("--db", default=DB_PATH)
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p_seed = sub.add_parser("seed", help="fill an empty store from a roster JSON (or the builder defaults)")
+    p_seed.add_argument("roster", nargs="?")
+    p_serve = sub.add_parser("serve", help="serve /roster on localhost")
+    p_serve.add_argument("--port", type=int, default=PORT)
+    args = ap.parse_args()
+
+    store = RosterStore(args.db)
+    if args.cmd == "seed":
+        if args.roster:
+            techs = json.loads(Path(args.roster).read_text(encoding="utf-8"))
+        else:
+            from build_service_coverage_page import DEFAULT_TECHS
+            techs = DEFAULT_TECHS
+        n = store.seed(techs)
+        print(f"Seeded {n} technicians into {args.db}" if n else f"{args.db} already has a roster; nothing seeded")
+    else:
+        print(f"Roster {args.db} at version {store.version()}")
+        serve(store.routes(), args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# Batch static maps: one lightweight page per technician and per region, rendered in a process pool.
+# A page embeds only its own data: simplified territory outline(s) and its ZIP polygons (tech pages add
+# the neighbouring ZIPs, clipped to a padded bounding box). Everything shared (Leaflet, the map runtime,
+# the page index used for navigation) goes into content-hashed files under assets/, written once and
+# cached by the browser across all pages. Regions come from a roster "region" field, else the main state.
+#
+# Usage: python static_pages.py --roster roster.json [--zips zips.parquet] [--out pages]
+#                               [--workers 8] [--vendor node_modules/leaflet/dist]
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+import tracing
+from map import load_zips
+from territories import dataset_version, normalize_zips, territory_union
+
+# ---------------------- SETTINGS ----------------------
+OUT_DIR   = "pages"
+WORKERS   = os.cpu_count() or 2
+PAD_DEG   = 0.05     # context ring of neighbouring ZIPs around a territory
+ZIP_TOL   = 0.0003   # ZIP simplification on the pages (~30 m)
+PRECISION = 1e-5     # coordinate grid of embedded geometry (~1 m)
+LEAFLET_JS  = "https://unpkg.com/leaflet@1.9.4/dist/leaflet.js"
+LEAFLET_CSS = "https://unpkg.com/leaflet@1.9.4/dist/leaflet.css"
+COLORS = ["#e11d48", "#22c55e", "#3b82f6", "#a855f7", "#f59e0b", "#ec4899", "#14b8a6", "#f97316",
+          "#84cc16", "#06b6d4", "#8b5cf6", "#ef4444"]
+# ------------------------------------------------------
+
+page_template = """<!doctype html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>__TITLE__</title>
+__HEAD__
+</head>
+<body>
+<div id="map"></div>
+<aside id="panel"></aside>
+<script>const PAGE = __PAGE__;</script>
+<script src="__RUNTIME__"></script>
+</body>
+</html>
+"""
+
+# Shared runtime: draws PAGE (inlined per page) with links from STATIC_INDEX (shared asset)
+runtime_js = """(function(){
+  const esc = s => String(s).replace(/[&<>"]/g, c => ({ "&":"&amp;", "<":"&lt;", ">":"&gt;", '"':"&quot;" })[c]);
+  const css = `
+    html, body, #map { height:100%; margin:0; }
+    body { font-family: system-ui, -apple-system, Segoe UI, Roboto, Helvetica, Arial; }
+    #panel { position:absolute; top:10px; right:10px; z-index:1000; max-width:300px; max-height:80vh; overflow:auto;
+      background:rgba(255,255,255,0.96); padding:10px 12px; border-radius:8px; box-shadow:0 6px 20px rgba(0,0,0,.15); font-size:12px; }
+    #panel h1 { font-size:15px; margin:0 0 4px; } #panel h2 { font-size:12px; margin:10px 0 4px; }
+    #panel .muted { color:#555; } #panel ul { margin:4px 0 0 16px; padding:0; } #panel .zips { word-break:break-all; }
+    .swatch { display:inline-block; width:12px; height:3px; border-radius:2px; margin-right:6px; vertical-align:middle; }
+    .tech-pill { font:600 11px system-ui; background:#fff; border:1px solid currentColor; border-radius:10px; padding:1px 6px; white-space:nowrap; }`;
+  document.head.appendChild(Object.assign(document.createElement("style"), { textContent: css }));
+
+  const map = L.map("map", { zoomSnap: 0.5, preferCanvas: true });
+  L.tileLayer("https://{s}.basemaps.cartocdn.com/light_all/{z}/{x}/{y}{r}.png", {
+    attribution: '&copy; <a href="https://www.openstreetmap.org/copyright">OSM</a> &copy; <a href="https://carto.com/attributions">CARTO</a>'
+  }).addTo(map);
+
+  L.geoJSON(PAGE.zips, {
+    style: f => f.properties.own ? { color:"#2b344d", weight:0.8, fillColor:"#8ecae6", fillOpacity:0.25 }
+                                 : { color:"#94a3b8", weight:0.5, fillOpacity:0.04 },
+    onEachFeature: (f, l) => l.bindTooltip(`<b>${f.properties.zip}</b> — ${esc(f.properties.city)}`, { sticky: true })
+  }).addTo(map);
+  const outlines = L.featureGroup().addTo(map);
+  PAGE.territories.forEach(t => {
+    if (!t.outline) return;
+    L.geoJSON(t.outline, { interactive:false, style: { color:"#ffffff", weight:7, opacity:0.85 } }).addTo(outlines);
+    L.geoJSON(t.outline, { interactive:false, style: { color:t.color, weight:3, opacity:1 } }).addTo(outlines);
+    if (t.label) L.marker([t.label[1], t.label[0]], { interactive:false,
+      icon: L.divIcon({ className:"", iconSize:null, html:`<div class="tech-pill" style="color:${t.color}">${esc(t.name)}</div>` }) }).addTo(outlines);
+  });
+  const b = outlines.getBounds();
+  if (b.isValid()) map.fitBounds(b, { padding:[20, 20] }); else map.setView([41.5, -88.0], 8);
+
+  const link = p => `<a href="${esc(p.href)}">${esc(p.title)}</a>`;
+  const idx = window.STATIC_INDEX || { pages: [] };
+  let h = `<h1>${esc(PAGE.title)}</h1><div class="muted">ZIP data ${esc(idx.version || "")}</div>`;
+  PAGE.territories.forEach(t => {
+    h += `<h2><span class="swatch" style="background:${t.color}"></span>${esc(t.name)}</h2>`;
+    if (t.contact) h += `<div>${esc(t.contact)}</div>`;
+    h += `<div class="muted">${t.zips.length} ZIPs${t.missing.length ? `, ${t.missing.length} not in dataset` : ""}</div>`;
+    if (PAGE.kind === "tech") h += `<div class="zips">${t.zips.join(", ")}</div>`;
+  });
+  const region = idx.pages.find(p => p.kind === "region" && p.region === PAGE.region);
+  if (PAGE.kind === "tech" && region) h += `<h2>Region</h2>${link(region)}`;
+  if (PAGE.kind === "region") {
+    const techs = idx.pages.filter(p => p.kind === "tech" && p.region === PAGE.region);
+    h += `<h2>Technicians</h2><ul>${techs.map(p => `<li>${link(p)}</li>`).join("")}</ul>`;
+  }
+  h += `<h2>All pages</h2>${link({ href: "index.html", title: "Index" })}`;
+  document.getElementById("panel").innerHTML = h;
+})();
+"""
+
+def slug(text) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", str(text).lower()).strip("-") or "x"
+
+def write_asset(out: Path, name: str, ext: str, data: bytes) -> str:
+    # content-hashed file name: unchanged assets keep their URL (and browser cache) across rebuilds
+    rel = f"assets/{name}.{hashlib.sha1(data).hexdigest()[:10]}.{ext}"
+    path = out / rel
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    return rel
+
+def tech_region(t, states: dict) -> str:
+    region = " ".join(str(t.get("region") or "").split())
+    if region:
+        return region
+    counts = Counter(states[z].strip().upper() for z in normalize_zips(t.get("zips", [])) if z in states)
+    return counts.most_common(1)[0][0] if counts else "Unassigned"
+
+def plan_pages(roster, states: dict) -> list:
+    # -> page specs (picklable dicts); the region page lists its techs in roster order
+    pages, regions = [], {}
+    for i, t in enumerate(roster):
+        tech = {"id": t["id"], "name": t["name"], "contact": t.get("contact", ""),
+                "zips": normalize_zips(t.get("zips", [])), "color": COLORS[i % len(COLORS)]}
+        # regions group case-insensitively ("IL" and "il" are one page, titled with the first spelling)
+        name = tech_region(t, states)
+        region, techs = regions.setdefault(name.casefold(), (name, []))
+        techs.append(tech)
+        pages.append({"kind": "tech", "slug": f"tech-{slug(t['id'])}", "title": t["name"], "region": slug(region),
+                      "techs": [tech]})
+    owner = {}
+    for region, _ in regions.values():
+        other = owner.setdefault(slug(region), region)
+        if other != region:
+            raise SystemExit(f"Regions {other!r} and {region!r} would both be written to region-{slug(region)}.html")
+    for region, techs in regions.values():
+        pages.append({"kind": "region", "slug": f"region-{slug(region)}", "title": f"Region {region}", "region": slug(region),
+                      "techs": techs})
+    return pages
+
+def display_geometry(geoms):
+    # one simplification pass for every page (display only; outlines come from full-resolution unions)
+    disp = shapely.set_precision(shapely.simplify(geoms, ZIP_TOL, preserve_topology=False), PRECISION)
+    bad = shapely.is_empty(disp) | ~shapely.is_valid(disp)
+    disp[bad] = geoms[bad]   # tiny or collapsed ZIPs keep their original shape
+    return disp
+
+# ---- worker side: ZIP geometry is sent once per process, pages are rendered independently ----
+_W = {}
+
+def _init_worker(wkb, disp_wkb, zips, cities, out, head, runtime):
+    disp = shapely.from_wkb(disp_wkb)
+    _W.update(gdf=gpd.GeoDataFrame(geometry=shapely.from_wkb(wkb)), disp=disp, tree=shapely.STRtree(disp),
+              zips=zips, cities=cities, out=Path(out), head=head, runtime=runtime,
+              positions={z: i for i, z in reversed(list(enumerate(zips)))})
+
+def territory_entry(t) -> dict:
+    u, missing = territory_union(_W["gdf"], _W["positions"], t["zips"])
+    entry = dict(t, missing=missing, outline=None, label=None, bounds=None)
+    if u is not None and not u.is_empty:
+        entry["bounds"] = list(u.bounds)
+        entry["outline"] = json.loads(shapely.to_geojson(shapely.set_precision(u.boundary, PRECISION)))
+        p = u.point_on_surface()
+        entry["label"] = [round(p.x, 5), round(p.y, 5)]
+    return entry
+
+def zip_features(box, own: set, own_only: bool) -> str:
+    # FeatureCollection JSON of the display ZIPs clipped to box, geometry serialized by GEOS in one call
+    rows = np.array(sorted(own), dtype=np.int64) if own_only else np.sort(_W["tree"].query(shapely.box(*box)))
+    clipped = shapely.set_precision(shapely.clip_by_rect(_W["disp"][rows], *box), PRECISION)
+    keep = ~shapely.is_empty(clipped)
+    rows, geo = rows[keep], shapely.to_geojson(clipped[keep])
+    feats = ",".join('{"type":"Feature","properties":%s,"geometry":%s}'
+                     % (json.dumps({"zip": _W["zips"][r], "city": _W["cities"][r], "own": bool(r in own)}, separators=(",", ":")), g)
+                     for r, g in zip(rows, geo))
+    return '{"type":"FeatureCollection","features":[' + feats + "]}"
+
+def render_page(spec) -> tuple:
+    # -> (file name, bytes, territory entries); region specs arrive with their techs' entries precomputed
+    # and show only the region's own ZIPs, tech pages add the neighbouring ZIPs around the territory
+    territories = spec.get("territories") or [territory_entry(t) for t in spec["techs"]]
+    positions = _W["positions"]
+    own = {positions[z] for t in territories for z in t["zips"] if z in positions}
+    b = np.array([t["bounds"] for t in territories if t["bounds"]])
+    zips = '{"type":"FeatureCollection","features":[]}'
+    if len(b):
+        zips = zip_features((b[:, 0].min() - PAD_DEG, b[:, 1].min() - PAD_DEG,
+                             b[:, 2].max() + PAD_DEG, b[:, 3].max() + PAD_DEG), own, spec["kind"] == "region")
+
+    page = {"kind": spec["kind"], "title": spec["title"], "region": spec["region"],
+            "territories": [{k: v for k, v in t.items() if k != "bounds"} for t in territories]}
+    data = json.dumps(page, separators=(",", ":"))[:-1] + ',"zips":' + zips + "}"
+    doc = (page_template.replace("__TITLE__", html.escape(spec["title"])).replace("__HEAD__", _W["head"])
+           .replace("__RUNTIME__", _W["runtime"]).replace("__PAGE__", data.replace("</", "<\\/")))
+    path = _W["out"] / f"{spec['slug']}.html"
+    path.write_text(doc, encoding="utf-8")
+    return path.name, len(doc), territories
+
+def shared_assets(out: Path, pages, version: str, vendor=None) -> tuple:
+    # -> (<head> tags, runtime asset path); Leaflet is bundled from --vendor or linked from the CDN
+    index = {"version": version, "pages": [{"kind": p["kind"], "slug": p["slug"], "title": p["title"],
+                                             "region": p["region"], "href": f"{p['slug']}.html"} for p in pages]}
+    js = "window.STATIC_INDEX = " + json.dumps(index, separators=(",", ":")) + ";\n"
+    if vendor:
+        vendor = Path(vendor)
+        css = write_asset(out, "leaflet", "css", (vendor / "leaflet.css").read_bytes())
+        js = (vendor / "leaflet.js").read_text(encoding="utf-8") + "\n" + js
+        head = f'<link rel="stylesheet" href="{css}">'
+    else:
+        head = (f'<link rel="stylesheet" href="{LEAFLET_CSS}" crossorigin="anonymous">\n'
+                f'<script src="{LEAFLET_JS}" crossorigin="anonymous"></script>')
+    runtime = write_asset(out, "static_map", "js", (js + runtime_js).encode("utf-8"))
+    return head, runtime
+
+def write_index(out: Path, pages):
+    items = lambda kind: "".join(f'<li><a href="{p["slug"]}.html">{html.escape(p["title"])}</a></li>'
+                                 for p in pages if p["kind"] == kind)
+    (out / "index.html").write_text(
+        f'<!doctype html><meta charset="utf-8"><title>Territory maps</title>'
+        f'<h1>Regions</h1><ul>{items("region")}</ul><h1>Technicians</h1><ul>{items("tech")}</ul>', encoding="utf-8")
+
+def build_pages(gdf, roster, out: Path, workers: int = WORKERS, vendor=None) -> list:
+    out.mkdir(parents=True, exist_ok=True)
+    zips, cities = gdf["zip"].astype(str).tolist(), gdf["city"].astype(str).tolist()
+    pages = plan_pages(roster, dict(zip(zips, gdf["STATE"].astype(str))))
+    with tracing.span("shared assets", pages=len(pages)):
+        head, runtime = shared_assets(out, pages, dataset_version(gdf), vendor)
+        geoms = gdf.geometry.to_numpy()
+        init = (shapely.to_wkb(geoms), shapely.to_wkb(display_geometry(geoms)), zips, cities, str(out), head, runtime)
+
+    techs = [p for p in pages if p["kind"] == "tech"]
+    regions = [p for p in pages if p["kind"] == "region"]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init) as pool:
+        chunk = max(1, len(techs) // (workers * 8))
+        with tracing.span("tech pages", pages=len(techs), workers=workers):
+            written = list(pool.map(render_page, techs, chunksize=chunk))
+        # region pages reuse the outlines their tech pages already computed
+        entries = {str(p["techs"][0]["id"]): w[2] for p, w in zip(techs, written)}
+        for p in regions:
+            p["territories"] = [e for t in p["techs"] for e in entries[str(t["id"])]]
+        with tracing.span("region pages", pages=len(regions), workers=workers):
+            written += list(pool.map(render_page, regions))
+    write_index(out, pages)
+    return [w[:2] for w in written]
+
+def main():
+    ap = argparse.ArgumentParser(description="Write one static map page per technician and per region.")
+    ap.add_argument("--roster", required=True, type=Path)
+    ap.add_argument("--zips", help="local ZIP snapshot (default: fetch IL+IN from ArcGIS)")
+    ap.add_argument("--out", type=Path, default=Path(OUT_DIR))
+    ap.add_argument("--workers", type=int, default=WORKERS)
+    ap.add_argument("--vendor", metavar="DIR", help="folder with leaflet.js + leaflet.css to bundle (default: CDN)")
+    ap.add_argument("--trace", metavar="JSON", help="write per-stage timing/memory as Chrome trace JSON")
+    args = ap.parse_args()
+    if args.trace:
+        tracing.enable()
+
+    roster = json.loads(args.roster.read_text(encoding="utf-8"))
+    gdf = load_zips(args.zips).reset_index(drop=True)
+    t0 = time.perf_counter()
+    written = build_pages(gdf, roster, args.out, args.workers, args.vendor)
+    kb = sum(n for _, n in written) / 1024
+    print(f"Wrote {len(written)} pages ({kb / max(len(written), 1):.0f} KB avg) -> {args.out} "
+          f"in {time.perf_counter() - t0:.1f}s")
+    if args.trace:
+        tracing.export(args.trace)
+        print(tracing.summary())
+
+if __name__ == "__main__":
+    main()
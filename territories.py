@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# Shared territory geometry helpers (ZIP-set keys, unions, outlines) used by the local API and batch tools.
+
+import hashlib
+
+import geopandas as gpd
+import shapely
+from shapely.geometry import mapping
+
+# Same tolerance curve the planner page applies after turf.union
+def union_tolerance(n_zips: int) -> float:
+    return min(0.002, 0.0006 + n_zips * 0.000004)
+
+def normalize_zips(zips) -> list:
+    return sorted({str(z).strip() for z in zips if str(z).strip()})
+
+def zip_set_key(zips) -> str:
+    # Order-independent hash of a ZIP set; used as the cache key for territory results.
+    # UTF-8 so a stray non-ASCII ZIP from a client is just an unknown ZIP, not a crash
+    return hashlib.sha1(",".join(normalize_zips(zips)).encode("utf-8")).hexdigest()
+
+def dataset_version(gdf: gpd.GeoDataFrame) -> str:
+    # Content hash over ZIP codes + geometry; changes whenever the snapshot does
+    h = hashlib.sha1()
+    order = gdf["zip"].astype(str).argsort(kind="stable")
+    zips = gdf["zip"].astype(str).to_numpy()[order]
+    wkb = shapely.to_wkb(gdf.geometry.to_numpy()[order])
+    for z, w in zip(zips, wkb):
+        h.update(z.encode("utf-8"))
+        h.update(w)
+    return h.hexdigest()[:16]
+
+def zip_positions(gdf: gpd.GeoDataFrame) -> dict:
+    # ZIP -> row position; duplicated ZIPs keep their first row
+    pos = {}
+    for i, z in enumerate(gdf["zip"].astype(str)):
+        pos.setdefault(z, i)
+    return pos
+
+def territory_union(gdf: gpd.GeoDataFrame, positions: dict, zips):
+    zips = normalize_zips(zips)
+    rows = [positions[z] for z in zips if z in positions]
+    missing = [z for z in zips if z not in positions]
+    if not rows:
+        return None, missing
+    u = shapely.union_all(gdf.geometry.to_numpy()[rows])
+    tol = union_tolerance(len(rows))
+    u = shapely.simplify(u, tol, preserve_topology=True)
+    return u, missing
+
+def territory_geojson(union, zips, missing) -> dict:
+    # union fill + perimeter outline, shaped like what the page draws
+    return {
+        "key": zip_set_key(zips),
+        "zips": normalize_zips(zips),
+        "missing": missing,
+        "union": mapping(union) if union is not None else None,
+        "outline": mapping(union.boundary) if union is not None else None,
+    }
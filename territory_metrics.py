@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# Territory quality metrics for rebalancing: area, perimeter, Polsby-Popper compactness (4πA/P²),
+# ZIP count, contiguity (number of separate polygon parts) and overlap with other territories.
+# ZIPs are projected once to CONUS Albers equal-area; each territory is one union, and the metric math
+# runs as array ops over all territories at once. Shape metrics depend only on the ZIP set and the
+# dataset, so they are cached by (dataset version, ZIP-set hash); overlap is recomputed every run.
+#
+# Usage: python territory_metrics.py --roster roster.json [--zips zips.parquet] [--out territory_metrics.csv]
+#        python build_service_coverage_page.py --roster roster.json --metrics [--zips zips.parquet]
+
+import argparse
+import json
+import math
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import shapely
+
+from map import load_zips
+from territories import dataset_version, normalize_zips, zip_positions, zip_set_key
+
+# ---------------------- SETTINGS ----------------------
+EQUAL_AREA_EPSG = 5070            # NAD83 / CONUS Albers
+SQ_M_PER_SQ_MI  = 2_589_988.110336
+M_PER_MI        = 1609.344
+CACHE_JSON      = "territory_metrics_cache.json"
+OUT_CSV         = "territory_metrics.csv"
+# ------------------------------------------------------
+
+def load_cache(path) -> dict:
+    p = Path(path)
+    return json.loads(p.read_text(encoding="utf-8")) if p.exists() else {}
+
+def save_cache(path, cache: dict):
+    Path(path).write_text(json.dumps(cache), encoding="utf-8")
+
+def shape_metrics(proj, positions, zip_sets) -> list:
+    # proj: equal-area geometries by row; one union per territory, then vectorized area/length/parts
+    rows = [[positions[z] for z in zs if z in positions] for zs in zip_sets]
+    unions = np.array([shapely.union_all(proj[r]) if r else shapely.Polygon() for r in rows], dtype=object)
+    area = shapely.area(unions)
+    perim = shapely.length(unions)
+    parts = np.where(shapely.is_empty(unions), 0, shapely.get_num_geometries(unions))
+    pp = np.divide(4 * math.pi * area, perim ** 2, out=np.zeros_like(area), where=perim > 0)
+    return [{"area_sq_mi": round(a / SQ_M_PER_SQ_MI, 2), "perimeter_mi": round(p / M_PER_MI, 2),
+             "polsby_popper": round(c, 4), "zip_count": len(r), "components": int(n),
+             "missing": len(zs) - len(r)}
+            for a, p, c, n, r, zs in zip(area, perim, pp, parts, rows, zip_sets)]
+
+def territory_metrics(gdf, roster, cache=None) -> dict:
+    # -> {zip_set_key: metrics}; `cache` (dict) is read and updated in place
+    cache = {} if cache is None else cache
+    version = dataset_version(gdf)
+    sets = {zip_set_key(t.get("zips", [])): normalize_zips(t.get("zips", [])) for t in roster}
+    todo = [k for k in sets if f"{version}:{k}" not in cache]
+
+    positions = zip_positions(gdf)
+    needed = sorted({positions[z] for zs in sets.values() for z in zs if z in positions})
+    proj = np.empty(len(gdf), dtype=object)
+    if needed:
+        proj[needed] = gdf.geometry.iloc[needed].to_crs(epsg=EQUAL_AREA_EPSG).to_numpy()
+    if todo:
+        for k, m in zip(todo, shape_metrics(proj, positions, [sets[k] for k in todo])):
+            cache[f"{version}:{k}"] = m
+
+    # overlap: ZIP areas owned by more than one territory (ZIPs tile the map, so shared ZIPs = shared area)
+    pairs = pd.DataFrame([(k, z) for k, zs in sets.items() for z in zs if z in positions], columns=["key", "zip"])
+    pairs["area"] = shapely.area(proj[[positions[z] for z in pairs["zip"]]]) / SQ_M_PER_SQ_MI if len(pairs) else []
+    owners = pd.DataFrame([(zip_set_key(t.get("zips", [])), z) for t in roster for z in normalize_zips(t.get("zips", []))],
+                          columns=["key", "zip"]).groupby("zip").size()
+    shared = pairs[pairs["zip"].map(owners).gt(1)].groupby("key")["area"].agg(["sum", "size"])
+
+    out = {}
+    for k in sets:
+        m = dict(cache[f"{version}:{k}"])
+        ov, n = (shared.loc[k, "sum"], int(shared.loc[k, "size"])) if k in shared.index else (0.0, 0)
+        m.update(overlap_sq_mi=round(float(ov), 2), overlap_zips=n,
+                 overlap_pct=round(100 * float(ov) / m["area_sq_mi"], 1) if m["area_sq_mi"] else 0.0)
+        out[k] = m
+    return out
+
+def main():
+    ap = argparse.ArgumentParser(description="Area, perimeter, compactness, contiguity and overlap per territory.")
+    ap.add_argument("--roster", required=True, type=Path)
+    ap.add_argument("--zips", help="local ZIP snapshot (default: fetch IL+IN from ArcGIS)")
+    ap.add_argument("--cache", default=CACHE_JSON)
+    ap.add_argument("--out", type=Path, default=Path(OUT_CSV))
+    args = ap.parse_args()
+
+    roster = json.loads(args.roster.read_text(encoding="utf-8"))
+    cache = load_cache(args.cache)
+    metrics = territory_metrics(load_zips(args.zips), roster, cache)
+    save_cache(args.cache, cache)
+    rows = [{"id": t["id"], "name": t["name"], **metrics[zip_set_key(t.get("zips", []))]} for t in roster]
+    pd.DataFrame(rows).to_csv(args.out, index=False)
+    print(f"Wrote metrics for {len(rows)} territories -> {args.out}")
+
+if __name__ == "__main__":
+    main()
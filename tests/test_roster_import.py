@@ -0,0 +1,65 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from roster_import import RosterBuilder, store_ids
+from roster_store import RosterStore
+
+ZIP_STATES = pd.Series({"60601": "IL", "60602": "IL", "46201": "IN", "46202": "IN"})
+
+def chunk(rows):
+    return pd.DataFrame([(i + 2, n, "", z, "") for i, (n, z) in enumerate(rows)],
+                        columns=["line", "name", "contact", "zip_cell", "state"])
+
+def test_import_into_seeded_store_keeps_existing_techs(tmp_path):
+    store = RosterStore(tmp_path / "roster.db")
+    store.seed([{"id": 1, "name": "Alice Smith", "contact": "a@x", "zips": ["60601"]},
+                {"id": 2, "name": "Bob Jones", "contact": "b@x", "zips": ["46201"]}])
+
+    b = RosterBuilder(ZIP_STATES)
+    b.add_chunk(chunk([("Carol New", "60602"), ("bob  JONES", "46202")]))
+    saved = store.upsert_many(store_ids(b.roster(), store.all_techs()))
+
+    techs = {t["id"]: t for t in store.all_techs()}
+    assert techs[1] == {"id": 1, "name": "Alice Smith", "contact": "a@x", "zips": ["60601"]}
+    assert techs[2]["zips"] == ["46202"]            # same tech by name: updated in place
+    carol = next(t for t in saved if t["name"] == "Carol New")
+    assert carol["id"] not in (1, 2)               # new tech: id allocated by the store
+    assert len(techs) == 3
+
+def test_explode_zips_ignores_empty_tokens():
+    from roster_import import explode_zips
+    df = explode_zips(chunk([("A", ",60601"), ("B", " 60602 ;"), ("C", ""), ("D", "60601, 46201")]))
+    assert df.groupby("name")["token"].apply(list).to_dict() == {
+        "A": ["60601"], "B": ["60602"], "C": [""], "D": ["60601", "46201"]}
+    b = RosterBuilder(ZIP_STATES)
+    bad = b.add_chunk(chunk([("A", ",60601"), ("B", " 60602"), ("C", "")]))
+    assert b.counts["malformed"] == 1 and bad["name"].tolist() == ["C"]
+
+def test_rejected_row_does_not_make_later_valid_row_a_duplicate():
+    rows = [("A", "60601"), ("A", "60601")]
+    one = RosterBuilder(ZIP_STATES, allowed_states=["IL"])
+    df = chunk(rows)
+    df.loc[0, "state"] = "IN"                      # first row rejected as wrong_state
+    bad = one.add_chunk(df)
+    assert bad["issue"].tolist() == ["wrong_state"]
+    assert one.roster()[0]["zips"] == ["60601"]
+
+    split = RosterBuilder(ZIP_STATES, allowed_states=["IL"])
+    split.add_chunk(df.iloc[:1])
+    split.add_chunk(df.iloc[1:])
+    assert split.roster() == one.roster()          # same result whatever the chunk size
+
+def test_reimporting_unchanged_roster_keeps_store_version(tmp_path):
+    store = RosterStore(tmp_path / "roster.db")
+    rows = [("Alice Smith", "60601, 60602"), ("Bob Jones", "46201")]
+    for _ in range(2):
+        b = RosterBuilder(ZIP_STATES)
+        b.add_chunk(chunk(rows))
+        saved = store.upsert_many(store_ids(b.roster(), store.all_techs()))
+    assert store.version() == 2
+    assert [t["version"] for t in saved] == [1, 2]
+    assert store.changes_since(2)["changes"] == []
@@ -0,0 +1,68 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from local_http import HTTPError, Request
+from roster_store import RosterStore
+
+ROSTER = [{"id": 1, "name": "Alice Smith", "contact": "a@x", "zips": ["60601", "60602"]},
+          {"id": 2, "name": "Bob Jones", "contact": "b@x", "zips": ["46201"]}]
+
+def test_changes_since_returns_only_newer_rows(tmp_path):
+    store = RosterStore(tmp_path / "roster.db")
+    store.seed(ROSTER)
+    v = store.version()
+    full = store.changes_since(0)
+    assert full["full"] and [t["id"] for t in full["changes"]] == [1, 2]
+
+    store.upsert({"id": 2, "name": "Bob Jones", "contact": "b@x", "zips": ["46201", "46202"]})
+    delta = store.changes_since(v)
+    assert not delta["full"] and delta["version"] == v + 1
+    assert [(t["id"], t["zips"]) for t in delta["changes"]] == [(2, ["46201", "46202"])]
+    assert store.changes_since(delta["version"])["changes"] == []
+
+def test_delete_leaves_tombstone_for_delta_sync(tmp_path):
+    store = RosterStore(tmp_path / "roster.db")
+    store.seed(ROSTER)
+    v = store.version()
+    assert store.delete(1) == v + 1
+    assert store.delete(1) == 0                       # already gone
+    assert store.changes_since(v)["changes"] == [{"id": 1, "version": v + 1, "deleted": True}]
+    assert [t["id"] for t in store.changes_since(0)["changes"]] == [2]   # full sync skips tombstones
+    assert [t["id"] for t in store.all_techs()] == [2]
+
+def test_unchanged_upsert_keeps_version(tmp_path):
+    store = RosterStore(tmp_path / "roster.db")
+    store.seed(ROSTER)
+    v = store.version()
+    saved = store.upsert_many([dict(t, zips=list(reversed(t["zips"]))) for t in ROSTER])
+    assert store.version() == v
+    assert [t["version"] for t in saved] == [1, 2]
+    assert store.changes_since(v)["changes"] == []
+
+    store.upsert_many([ROSTER[0], dict(ROSTER[1], contact="new@x")])
+    assert store.version() == v + 1
+    assert [t["id"] for t in store.changes_since(v)["changes"]] == [2]
+
+def test_invalid_technicians_are_rejected(tmp_path):
+    store = RosterStore(tmp_path / "roster.db")
+    for bad in ({"name": "A", "zips": "60601"}, {"name": "A", "zips": []}, {"name": "A", "zips": ["6060", "abcde"]},
+                {"name": "A"}, {"name": " ", "zips": ["60601"]}, "not a tech"):
+        with pytest.raises(ValueError):
+            store.upsert(bad)
+    assert store.version() == 0 and store.all_techs() == []
+
+def test_post_roster_returns_400_for_invalid_tech(tmp_path):
+    store = RosterStore(tmp_path / "roster.db")
+    post = store.routes()[("POST", "/roster")]
+    req = Request("POST", "/roster", {}, json.dumps({"techs": [{"name": "A", "zips": "60601"}]}).encode())
+    with pytest.raises(HTTPError) as e:
+        asyncio.run(post(req))
+    assert e.value.status == 400
+    ok = asyncio.run(post(Request("POST", "/roster", {}, json.dumps({"name": "A", "zips": ["60601"]}).encode())))
+    assert ok.status == 200 and json.loads(ok.body)["techs"][0]["zips"] == ["60601"]
@@ -0,0 +1,27 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from static_pages import plan_pages
+
+STATES = {"60601": "IL", "60602": "il", "46201": "IN"}
+
+def regions(pages):
+    return {p["slug"]: [t["id"] for t in p["techs"]] for p in pages if p["kind"] == "region"}
+
+def test_region_case_variants_share_one_page():
+    roster = [{"id": 1, "name": "A", "zips": ["60601"]}, {"id": 2, "name": "B", "zips": ["60602"]},
+              {"id": 3, "name": "C", "zips": ["46201"], "region": "North West"},
+              {"id": 4, "name": "D", "zips": ["46201"], "region": "north  west"}]
+    pages = plan_pages(roster, STATES)
+    assert regions(pages) == {"region-il": [1, 2], "region-north-west": [3, 4]}
+    assert len({p["slug"] for p in pages}) == len(pages)
+
+def test_region_slug_collision_fails():
+    roster = [{"id": 1, "name": "A", "zips": ["60601"], "region": "North-West"},
+              {"id": 2, "name": "B", "zips": ["60601"], "region": "North West"}]
+    with pytest.raises(SystemExit):
+        plan_pages(roster, STATES)
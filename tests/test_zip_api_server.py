@@ -0,0 +1,83 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import geopandas as gpd
+import pytest
+from shapely.geometry import box
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from local_http import start
+from zip_api_server import ZipService
+
+def grid(n=3, size=0.05):
+    # n x n block of square "ZIPs" near Chicago
+    cells = [(i, j) for i in range(n) for j in range(n)]
+    return gpd.GeoDataFrame({"zip": [f"606{k:02d}" for k in range(len(cells))],
+                             "city": ["Chicago"] * len(cells), "STATE": ["IL"] * len(cells)},
+                            geometry=[box(-88 + i * size, 41.8 + j * size, -88 + (i + 1) * size, 41.8 + (j + 1) * size)
+                                      for i, j in cells], crs="EPSG:4326")
+
+@pytest.fixture(scope="module")
+def service():
+    return ZipService(grid())
+
+def fetch(service, *requests):
+    # -> [(status, headers, body)] for raw (method, path, headers, body) requests on one server
+    async def run():
+        server = await start(service.routes(), 0)
+        port = server.sockets[0].getsockname()[1]
+        out = []
+        for method, path, headers, body in requests:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            head = f"{method} {path} HTTP/1.1\r\nHost: x\r\nConnection: close\r\n"
+            head += "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+            if body is not None:
+                head += f"Content-Length: {len(body)}\r\n"
+            writer.write(head.encode("latin-1") + b"\r\n" + (body or b""))
+            raw = await reader.read()
+            writer.close()
+            top, _, payload = raw.partition(b"\r\n\r\n")
+            lines = top.decode("latin-1").split("\r\n")
+            hdrs = dict(l.split(": ", 1) for l in lines[1:])
+            out.append((int(lines[0].split()[1]), hdrs, payload))
+        server.close()
+        await server.wait_closed()
+        return out
+    return asyncio.run(run())
+
+def get(service, path, headers=None):
+    return fetch(service, ("GET", path, headers or {}, None))[0]
+
+def test_territory_etag_revalidates_with_304(service):
+    status, headers, body = get(service, "/territory?zips=60600,60601")
+    assert status == 200 and json.loads(body)["missing"] == []
+    status, _, body = get(service, "/territory?zips=60601,60600", {"If-None-Match": headers["ETag"]})
+    assert status == 304 and body == b""
+
+@pytest.mark.parametrize("path", [
+    "/zips?zoom=nan", "/zips?zoom=inf", "/zips?zoom=abc", "/zips?bbox=nan,41,-87,42", "/zips?bbox=-87,41,-88,42",
+    "/select?lon=nan&lat=41.8&miles=5", "/select?lon=-88&lat=95&miles=5", "/select?lon=-88&lat=41.8&miles=0",
+    "/select?lon=-88&lat=41.8", "/territory?zips=", "/nowhere",
+])
+def test_bad_queries_are_client_errors(service, path):
+    status, _, body = get(service, path)
+    assert status in (400, 404) and "error" in json.loads(body)
+
+def test_extreme_zoom_is_clamped(service):
+    for zoom in ("-10000", "1e9"):
+        status, _, body = get(service, f"/zips?zoom={zoom}")
+        assert status == 200 and len(json.loads(body)["features"]) == 9
+
+def test_malformed_bodies_are_400(service):
+    (s1, _, _), (s2, _, _) = fetch(service, ("POST", "/territory", {}, b"{not json"),
+                                   ("POST", "/territory", {"Content-Length": "abc"}, None))
+    assert s1 == 400 and s2 == 400
+
+def test_zips_properties(service):
+    status, _, body = get(service, "/zips?bbox=-88,41.8,-87.96,41.84&zoom=10")
+    feats = json.loads(body)["features"]
+    assert status == 200 and feats and all(f["properties"]["STATE"] == "IL" for f in feats)
+    assert feats[0]["properties"] == {"zip": "60600", "city": "Chicago", "STATE": "IL"}
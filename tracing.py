@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# Stage spans for the build scripts: wall time + peak memory, exported as Chrome trace JSON
+# (open in chrome://tracing or ui.perfetto.dev). Spans are no-ops until enable() is called.
+#
+#   import tracing
+#   tracing.enable()
+#   with tracing.span("clean", state="IL"):
+#       ...
+#   tracing.export("trace.json")
+
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+_enabled = False
+_events = []
+_stack = []        # peak-so-far (bytes) of each open span, innermost last
+_t0 = time.perf_counter_ns()
+
+def enable():
+    global _enabled
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _enabled = True
+
+def enabled() -> bool:
+    return _enabled
+
+def _rss_peak_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    r = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return r / (1024 * 1024) if sys.platform == "darwin" else r / 1024
+
+@contextmanager
+def span(name: str, **args):
+    if not _enabled:
+        yield
+        return
+    # tracemalloc keeps one global peak: fold it into the parent before resetting it for this span
+    if _stack:
+        _stack[-1] = max(_stack[-1], tracemalloc.get_traced_memory()[1])
+    tracemalloc.reset_peak()
+    cur0 = tracemalloc.get_traced_memory()[0]
+    _stack.append(cur0)
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        end = time.perf_counter_ns()
+        cur1, peak = tracemalloc.get_traced_memory()
+        peak = max(_stack.pop(), peak)
+        if _stack:
+            _stack[-1] = max(_stack[-1], peak)
+        _events.append({
+            "name": name, "cat": "stage", "ph": "X",
+            "ts": (start - _t0) / 1000, "dur": (end - start) / 1000,
+            "pid": os.getpid(), "tid": threading.get_ident(),
+            "args": dict(args, peak_mb=round(peak / 2**20, 2), delta_mb=round((cur1 - cur0) / 2**20, 2),
+                         rss_peak_mb=round(_rss_peak_mb(), 1)),
+        })
+
+def events() -> list:
+    return list(_events)
+
+def export(path):
+    doc = {"traceEvents": _events, "displayTimeUnit": "ms"}
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(doc, f)
+
+def summary() -> str:
+    lines = [f"{'stage':<34}{'wall s':>9}{'peak MB':>9}"]
+    for e in sorted(_events, key=lambda e: e["ts"]):
+        lines.append(f"{e['name']:<34}{e['dur'] / 1e6:>9.3f}{e['args']['peak_mb']:>9.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# Local territory/geometry API for the coverage planner (asyncio, localhost only).
+# Loads the IL+IN ZIP GeoDataFrame once (map.load_zips) and serves:
+#   GET  /meta                          dataset version, feature count, bounds
+#   GET  /zips?bbox=W,S,E,N&zoom=Z      ZIP polygons in a bbox, simplified for the zoom
+#   GET  /select?bbox=W,S,E,N           rectangle selection: ZIP list + union + outline
+#   GET  /select?lon=X&lat=Y&miles=R    radius selection (great-circle), same response
+#   POST /select  {"polygon": {...}}    freehand polygon (lasso) selection, same response
+#   GET  /territory?zips=60452,60453    territory union + outline for a ZIP set
+#   POST /territory  {"zips": [...]}    same, for ZIP sets too long for a URL
+#   /roster ...                         technician roster sync, with --roster-db (see roster_store.py)
+# Results are kept in an LRU keyed by (ZIP-set hash, dataset version); responses carry ETags and gzip.
+#
+# Usage: python zip_api_server.py [--data snapshot.geojson] [--port 8765]
+#        python build_service_coverage_page.py --api http://127.0.0.1:8765
+
+import argparse
+import asyncio
+import hashlib
+import math
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import shapely
+from shapely.geometry import box, mapping
+
+from local_http import HTTPError, json_response, serve
+from map import load_zips
+from roster_store import RosterStore
+from territories import (dataset_version, normalize_zips, territory_geojson,
+                         territory_union, zip_positions, zip_set_key)
+from zip_selection import MAX_RADIUS_MI, ZipSelector, parse_polygon
+
+# ---------------------- SETTINGS ----------------------
+PORT        = 8765
+CACHE_SIZE  = 512    # computed responses kept in the LRU
+WORKERS     = 4      # geometry threads (shapely releases the GIL)
+MAX_ZOOM_SIMPLIFY = 14  # at or above this zoom, ZIPs are served at full resolution
+ZOOM_RANGE  = (0, 22)  # requested zooms are clamped to the map's zoom levels
+# ------------------------------------------------------
+
+class LRU:
+    def __init__(self, size: int):
+        self.size = size
+        self.items = OrderedDict()
+        self.hits = self.misses = 0
+
+    def get(self, key):
+        if key in self.items:
+            self.items.move_to_end(key)
+            self.hits += 1
+            return self.items[key]
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        while len(self.items) > self.size:
+            self.items.popitem(last=False)
+
+def zoom_tolerance(zoom: float) -> float:
+    # about half a screen pixel in degrees at this zoom (256px tiles)
+    if zoom >= MAX_ZOOM_SIMPLIFY:
+        return 0.0
+    return 360.0 / (256 * 2 ** zoom) / 2
+
+def parse_number(query, key, lo=-math.inf, hi=math.inf, default=None) -> float:
+    # finite float query parameter within [lo, hi]; nan/inf and out-of-range values are a 400
+    if key not in query and default is not None:
+        return default
+    try:
+        v = float(query[key])
+    except (KeyError, ValueError):
+        raise HTTPError(400, f"{key} must be a number")
+    if not (math.isfinite(v) and lo <= v <= hi):
+        raise HTTPError(400, f"{key} must be a finite number in [{lo}, {hi}]")
+    return v
+
+def parse_bbox(text):
+    try:
+        w, s, e, n = (float(v) for v in text.split(","))
+    except (AttributeError, ValueError):
+        raise HTTPError(400, "bbox must be W,S,E,N")
+    if not all(math.isfinite(v) for v in (w, s, e, n)) or w > e or s > n:
+        raise HTTPError(400, "bbox must be W,S,E,N")
+    return round(w, 5), round(s, 5), round(e, 5), round(n, 5)
+
+class ZipService:
+    def __init__(self, gdf):
+        self.gdf = gdf.reset_index(drop=True)
+        self.geoms = self.gdf.geometry.to_numpy()
+        self.sindex = self.gdf.sindex
+        self.positions = zip_positions(self.gdf)
+        # feature properties built once; /zips and /select index into this per row
+        self.rows = self.gdf[["zip", "city", "STATE"]].assign(zip=self.gdf["zip"].astype(str)).to_dict("records")
+        self.selector = ZipSelector(self.gdf)
+        self.version = dataset_version(self.gdf)
+        self.cache = LRU(CACHE_SIZE)
+        self.pool = ThreadPoolExecutor(max_workers=WORKERS)
+
+    async def cached(self, key, compute):
+        key = key + (self.version,)
+        resp = self.cache.get(key)
+        if resp is None:
+            obj = await asyncio.get_running_loop().run_in_executor(self.pool, compute)
+            resp = json_response(obj, etag=hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:20])
+            self.cache.put(key, resp)
+        return resp
+
+    def props(self, i) -> dict:
+        return self.rows[i]
+
+    # ---- geometry work (runs in the thread pool) ----
+    def zips_in_bbox(self, bbox, zoom):
+        rows = self.sindex.query(box(*bbox), predicate="intersects") if bbox else range(len(self.gdf))
+        rows = sorted(int(i) for i in rows)
+        geoms = self.geoms[rows]
+        tol = zoom_tolerance(zoom)
+        if tol > 0:
+            geoms = shapely.simplify(geoms, tol, preserve_topology=True)
+        feats = [{"type": "Feature", "properties": self.props(i), "geometry": mapping(g)}
+                 for i, g in zip(rows, geoms)]
+        return {"type": "FeatureCollection", "version": self.version, "features": feats}
+
+    def select_rows(self, rows):
+        items = sorted((self.props(int(i)) for i in rows), key=lambda p: p["zip"])
+        zips = [p["zip"] for p in items]
+        u, missing = territory_union(self.gdf, self.positions, zips)
+        out = territory_geojson(u, zips, missing)
+        out["items"] = items
+        return out
+
+    def territory(self, zips):
+        u, missing = territory_union(self.gdf, self.positions, zips)
+        return territory_geojson(u, zips, missing)
+
+    # ---- routes ----
+    async def meta(self, req):
+        w, s, e, n = (float(v) for v in self.gdf.total_bounds)
+        return json_response({"version": self.version, "count": len(self.gdf), "bounds": [w, s, e, n],
+                              "cache": {"size": len(self.cache.items), "hits": self.cache.hits,
+                                        "misses": self.cache.misses}})
+
+    async def get_zips(self, req):
+        bbox = parse_bbox(req.query["bbox"]) if "bbox" in req.query else None
+        zoom = parse_number(req.query, "zoom", default=MAX_ZOOM_SIMPLIFY)
+        zoom = min(max(zoom, ZOOM_RANGE[0]), ZOOM_RANGE[1])
+        tol_key = round(zoom_tolerance(zoom), 8)
+        return await self.cached(("zips", bbox, tol_key), lambda: self.zips_in_bbox(bbox, zoom))
+
+    async def get_select(self, req):
+        if "bbox" in req.query:
+            bbox = parse_bbox(req.query["bbox"])
+            return await self.cached(("select", bbox), lambda: self.select_rows(self.selector.bbox(*bbox)))
+        if not all(k in req.query for k in ("lon", "lat", "miles")):
+            raise HTTPError(400, "expected bbox=W,S,E,N or lon=&lat=&miles=")
+        lon = round(parse_number(req.query, "lon", -180, 180), 5)
+        lat = round(parse_number(req.query, "lat", -90, 90), 5)
+        miles = round(parse_number(req.query, "miles", 0, MAX_RADIUS_MI), 5)
+        if miles <= 0:
+            raise HTTPError(400, f"miles must be in (0, {MAX_RADIUS_MI}]")
+        return await self.cached(("radius", lon, lat, miles),
+                                 lambda: self.select_rows(self.selector.radius(lon, lat, miles)))
+
+    async def post_select(self, req):
+        body = req.json()
+        try:
+            poly = parse_polygon(body["polygon"])
+        except (KeyError, TypeError, ValueError, AttributeError, shapely.errors.GEOSException):
+            raise HTTPError(400, 'expected {"polygon": <GeoJSON Polygon>}')
+        key = hashlib.sha1(shapely.to_wkb(shapely.set_precision(poly, 1e-6))).hexdigest()
+        return await self.cached(("lasso", key), lambda: self.select_rows(self.selector.polygon(poly)))
+
+    async def get_territory(self, req):
+        zips = normalize_zips((req.query.get("zips") or "").split(","))
+        return await self._territory(zips)
+
+    async def post_territory(self, req):
+        body = req.json()
+        if not isinstance(body, dict) or not isinstance(body.get("zips"), list):
+            raise HTTPError(400, 'expected {"zips": [...]}')
+        return await self._territory(normalize_zips(body["zips"]))
+
+    async def _territory(self, zips):
+        if not zips:
+            raise HTTPError(400, "no ZIPs given")
+        return await self.cached(("territory", zip_set_key(zips)), lambda: self.territory(zips))
+
+    def routes(self) -> dict:
+        return {
+            ("GET", "/meta"): self.meta,
+            ("GET", "/zips"): self.get_zips,
+            ("GET", "/select"): self.get_select,
+            ("POST", "/select"): self.post_select,
+            ("GET", "/territory"): self.get_territory,
+            ("POST", "/territory"): self.post_territory,
+        }
+
+def main():
+    ap = argparse.ArgumentParser(description="Local ZIP territory/geometry API (localhost only).")
+    ap.add_argument("--data", help="local ZIP snapshot (default: fetch IL+IN from ArcGIS once at startup)")
+    ap.add_argument("--port", type=int, default=PORT)
+    ap.add_argument("--roster-db", help="also serve /roster from this SQLite roster store")
+    args = ap.parse_args()
+
+    gdf = load_zips(args.data)
+    svc = ZipService(gdf)
+    print(f"Loaded {len(gdf)} ZIPs (dataset {svc.version})")
+    routes = svc.routes()
+    if args.roster_db:
+        routes.update(RosterStore(args.roster_db).routes())
+    serve(routes, args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+# Streaming ZIP ingest into GeoParquet. Features are fetched/parsed a page at a time (ArcGIS
+# resultOffset paging, or GDAL's Arrow batch reader for local files), cleaned and simplified per
+# chunk with map.prepare_zips, and appended as Parquet row groups, so peak memory follows the chunk
+# size instead of the dataset size. Each row carries a GeoParquet 1.1 bbox covering column, so
+# readers can skip whole row groups outside a bounding box and load only the columns they need.
+#
+# Usage: python zip_ingest.py [--states IL,IN] [--out zips.parquet] [--page 1000]
+#        python zip_ingest.py zips_snapshot.geojson [--out zips.parquet]
+#        then pass zips.parquet as --zips / --data to the other tools
+
+import argparse
+import json
+import urllib.parse
+import urllib.request
+from pathlib import Path
+
+import geopandas as gpd
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import shapely
+
+import tracing
+from map import BASE, prepare_zips, repair_report
+
+# ---------------------- SETTINGS ----------------------
+STATES    = ["IL", "IN"]
+PAGE_SIZE = 1000     # features per ArcGIS request / file batch (the service caps pages at 2000)
+ROW_GROUP = 2000     # rows per Parquet row group = smallest unit a bbox read can skip
+OUT_PARQUET = "zips.parquet"
+# ------------------------------------------------------
+
+SCHEMA = pa.schema([
+    ("zip", pa.string()), ("city", pa.string()), ("STATE", pa.string()), ("geometry", pa.binary()),
+    ("bbox", pa.struct([("xmin", pa.float64()), ("ymin", pa.float64()), ("xmax", pa.float64()), ("ymax", pa.float64())])),
+])
+
+def geo_metadata(crs) -> bytes:
+    col = {"encoding": "WKB", "geometry_types": ["Polygon", "MultiPolygon"], "crs": crs.to_json_dict(),
+           "covering": {"bbox": {k: ["bbox", k] for k in ("xmin", "ymin", "xmax", "ymax")}}}
+    return json.dumps({"version": "1.1.0", "primary_column": "geometry", "columns": {"geometry": col}}).encode()
+
+def iter_arcgis_pages(state: str, page: int = PAGE_SIZE):
+    # ordered by ZIP so offsets are stable and row groups stay regionally compact. A short page is not the
+    # end: the service silently caps pages at its maxRecordCount, which may be below `page`, so keep going
+    # until a page comes back empty.
+    offset = 0
+    while True:
+        q = urllib.parse.urlencode({"where": f"STATE = '{state}'", "outFields": "ZIP_CODE,PO_NAME,STATE",
+                                    "outSR": 4326, "f": "geojson", "orderByFields": "ZIP_CODE",
+                                    "resultOffset": offset, "resultRecordCount": page})
+        with urllib.request.urlopen(f"{BASE}?{q}", timeout=120) as r:
+            features = json.load(r).get("features", [])
+        if not features:
+            break
+        yield gpd.GeoDataFrame.from_features(features, crs="EPSG:4326")
+        offset += len(features)
+    print(f"{state}: fetched {offset} features from ArcGIS")
+
+def iter_file_chunks(path, page: int = PAGE_SIZE):
+    # GDAL reads the file incrementally and hands back Arrow batches of WKB
+    import pyogrio
+    with pyogrio.open_arrow(str(path), batch_size=page, use_pyarrow=True) as (meta, reader):
+        geom_col = meta["geometry_name"] or "wkb_geometry"
+        for batch in reader:
+            df = batch.to_pandas()
+            geom = shapely.from_wkb(df.pop(geom_col))
+            yield gpd.GeoDataFrame(df, geometry=geom, crs=meta["crs"])
+
+class GeoParquetSink:
+    def __init__(self, path: Path, row_group: int = ROW_GROUP):
+        self.path = path
+        self.row_group = row_group
+        self.writer = None
+        self.buffer = []
+        self.buffered = 0
+        self.rows = 0
+
+    def append(self, gdf: gpd.GeoDataFrame):
+        # buffer small chunks up to a full row group; a row group is the unit of lazy reads
+        if len(gdf):
+            self.buffer.append(gdf)
+            self.buffered += len(gdf)
+        while self.buffered >= self.row_group:
+            self._flush(self.row_group)
+
+    def _flush(self, n):
+        gdf = pd.concat(self.buffer, ignore_index=True)
+        head, rest = gdf.iloc[:n], gdf.iloc[n:]
+        self.buffer, self.buffered = ([rest] if len(rest) else []), len(rest)
+        geoms = head.geometry.to_numpy()
+        b = shapely.bounds(geoms)
+        bbox = pa.StructArray.from_arrays([pa.array(b[:, i]) for i in range(4)], names=["xmin", "ymin", "xmax", "ymax"])
+        table = pa.Table.from_arrays([pa.array(head["zip"].astype(str)), pa.array(head["city"].astype(str)),
+                                      pa.array(head["STATE"].astype(str)), pa.array(shapely.to_wkb(geoms)), bbox],
+                                     schema=SCHEMA)
+        if self.writer is None:
+            schema = SCHEMA.with_metadata({b"geo": geo_metadata(head.crs)})
+            self.writer = pq.ParquetWriter(self.path, schema, compression="zstd")
+        self.writer.write_table(table, row_group_size=self.row_group)
+        self.rows += len(head)
+
+    def close(self):
+        if self.buffered:
+            self._flush(self.buffered)
+        if self.writer is not None:
+            self.writer.close()
+
+def ingest(chunks, out: Path, row_group: int = ROW_GROUP, repairs=None) -> int:
+    sink = GeoParquetSink(out, row_group)
+    try:
+        for i, chunk in enumerate(chunks):
+            with tracing.span("ingest chunk", chunk=i, features=len(chunk)):
+                sink.append(prepare_zips(chunk, f"chunk {i}", repairs))
+    finally:
+        sink.close()
+    return sink.rows
+
+def read_zip_parquet(path, columns=None, bbox=None) -> gpd.GeoDataFrame:
+    # memory-mapped; bbox=(minx, miny, maxx, maxy) skips row groups via the bbox column statistics
+    cols = list(columns or ["zip", "city", "STATE"]) + ["geometry"]
+    filters = None
+    if bbox is not None:
+        w, s, e, n = bbox
+        filters = ((pc.field("bbox", "xmin") <= e) & (pc.field("bbox", "xmax") >= w)
+                   & (pc.field("bbox", "ymin") <= n) & (pc.field("bbox", "ymax") >= s))
+    gdf = gpd.read_parquet(path, columns=cols, filters=filters, memory_map=True)
+    gdf["zip"] = gdf["zip"].astype(str)
+    return gdf
+
+def main():
+    ap = argparse.ArgumentParser(description="Stream ZIP polygons into a GeoParquet file in bounded memory.")
+    ap.add_argument("source", nargs="?", help="local GeoJSON/GPKG/shapefile (default: page IL+IN from ArcGIS)")
+    ap.add_argument("--states", default=",".join(STATES))
+    ap.add_argument("--out", type=Path, default=Path(OUT_PARQUET))
+    ap.add_argument("--page", type=int, default=PAGE_SIZE)
+    ap.add_argument("--row-group", type=int, default=ROW_GROUP)
+    ap.add_argument("--trace", metavar="JSON", help="write per-chunk timing/memory as Chrome trace JSON")
+    ap.add_argument("--repair-report", metavar="CSV", help="write per-ZIP geometry repair counts/failures")
+    args = ap.parse_args()
+
+    if args.trace:
+        tracing.enable()
+    if args.source:
+        chunks = iter_file_chunks(args.source, args.page)
+    else:
+        chunks = (c for s in args.states.split(",") for c in iter_arcgis_pages(s.strip().upper(), args.page))
+    repairs = []
+    with tracing.span("ingest"):
+        rows = ingest(chunks, args.out, args.row_group, repairs)
+    print(f"Wrote {rows} ZIPs -> {args.out} ({pq.ParquetFile(args.out).num_row_groups} row groups)")
+    if args.repair_report:
+        repair_report(repairs).to_csv(args.repair_report, index=False)
+    if args.trace:
+        tracing.export(args.trace)
+        print(tracing.summary())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# ZIP selection by freehand polygon (lasso), rectangle, or "within N miles of a point".
+# Polygons: STRtree bbox candidates, then one vectorized intersects against the prepared lasso.
+# Radius: KD-tree over ZIP representative points on the unit sphere; a ZIP can only touch the circle
+# if its point is within radius + reach (reach = farthest vertex from that point), and survivors are
+# refined exactly against a prepared geodesic circle polygon.
+#
+# Usage: python zip_selection.py --radius -87.63,41.88,25 [--zips zips.parquet]
+#        python zip_selection.py --polygon lasso.geojson [--zips zips.parquet]
+
+import argparse
+import json
+
+import numpy as np
+import shapely
+from scipy.spatial import cKDTree
+from shapely.geometry import box, shape
+
+from map import load_zips
+from nearest_tech import EARTH_RADIUS_MI, miles_to_chord, unit_xyz
+
+# ---------------------- SETTINGS ----------------------
+CIRCLE_SEGMENTS = 128   # vertices of the radius polygon (edge error < 0.03% of the radius)
+MAX_RADIUS_MI   = 500
+# ------------------------------------------------------
+
+def circle_polygon(lon: float, lat: float, miles: float, n: int = CIRCLE_SEGMENTS):
+    # geodesic circle on the sphere (destination-point formula), as a lon/lat polygon
+    d = miles / EARTH_RADIUS_MI
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    brg = np.linspace(0, 2 * np.pi, n, endpoint=False)
+    lat2 = np.arcsin(np.sin(lat1) * np.cos(d) + np.cos(lat1) * np.sin(d) * np.cos(brg))
+    lon2 = lon1 + np.arctan2(np.sin(brg) * np.sin(d) * np.cos(lat1), np.cos(d) - np.sin(lat1) * np.sin(lat2))
+    return shapely.Polygon(np.column_stack([np.degrees(lon2), np.degrees(lat2)]))
+
+class ZipSelector:
+    def __init__(self, gdf):
+        self.geoms = gdf.geometry.to_numpy()
+        self.tree = shapely.STRtree(self.geoms)
+        reps = shapely.point_on_surface(self.geoms)
+        self.rep_xyz = rep_xyz = unit_xyz(shapely.get_x(reps), shapely.get_y(reps))
+        self.kd = cKDTree(rep_xyz)
+        # reach = chord from the representative point to the farthest vertex of its ZIP
+        coords, owner = shapely.get_coordinates(self.geoms, return_index=True)
+        dist = np.linalg.norm(unit_xyz(coords[:, 0], coords[:, 1]) - rep_xyz[owner], axis=1)
+        self.reach = np.zeros(len(self.geoms))
+        np.maximum.at(self.reach, owner, dist)
+        self.max_reach = float(self.reach.max()) if len(self.reach) else 0.0
+
+    def polygon(self, poly) -> np.ndarray:
+        # row positions of ZIPs intersecting a (lasso) polygon
+        shapely.prepare(poly)
+        cand = self.tree.query(poly)
+        return np.sort(cand[shapely.intersects(poly, self.geoms[cand])])
+
+    def bbox(self, w, s, e, n) -> np.ndarray:
+        return self.polygon(box(w, s, e, n))
+
+    def radius(self, lon: float, lat: float, miles: float) -> np.ndarray:
+        # row positions of ZIPs with any part within `miles` (great-circle) of lon/lat
+        q = unit_xyz([lon], [lat])[0]
+        r = float(miles_to_chord(miles))
+        cand = np.asarray(self.kd.query_ball_point(q, r + self.max_reach), dtype=np.int64)
+        if not len(cand):
+            return cand
+        near = np.linalg.norm(self.rep_xyz[cand] - q, axis=1) <= r + self.reach[cand]
+        cand = cand[near]
+        circle = circle_polygon(lon, lat, miles)
+        shapely.prepare(circle)
+        return np.sort(cand[shapely.intersects(circle, self.geoms[cand])])
+
+def parse_polygon(geom: dict):
+    # GeoJSON Polygon/MultiPolygon (or a Feature wrapping one) -> valid shapely geometry
+    if isinstance(geom, dict) and geom.get("type") == "Feature":
+        geom = geom.get("geometry")
+    poly = shape(geom)
+    if poly.geom_type not in ("Polygon", "MultiPolygon") or poly.is_empty:
+        raise ValueError("expected a Polygon or MultiPolygon")
+    return poly if poly.is_valid else shapely.make_valid(poly)   # self-crossing lassos are common
+
+def main():
+    ap = argparse.ArgumentParser(description="List ZIPs inside a polygon or within N miles of a point.")
+    ap.add_argument("--zips", help="local ZIP snapshot (default: fetch IL+IN from ArcGIS)")
+    g = ap.add_mutually_exclusive_group(required=True)
+    g.add_argument("--radius", metavar="LON,LAT,MILES")
+    g.add_argument("--polygon", metavar="GEOJSON", help="file with a Polygon geometry or Feature")
+    args = ap.parse_args()
+
+    gdf = load_zips(args.zips).reset_index(drop=True)
+    sel = ZipSelector(gdf)
+    if args.radius:
+        lon, lat, miles = (float(v) for v in args.radius.split(","))
+        rows = sel.radius(lon, lat, min(miles, MAX_RADIUS_MI))
+    else:
+        with open(args.polygon, encoding="utf-8") as f:
+            rows = sel.polygon(parse_polygon(json.load(f)))
+    for _, r in gdf.iloc[rows].sort_values("zip").iterrows():
+        print(f"{r['zip']}\t{r['city']}\t{r['STATE']}")
+    print(f"{len(rows)} ZIPs")
+
+if __name__ == "__main__":
+    main()